@@ -0,0 +1,41 @@
+import numpy as np
+
+from dsutils.utils.binners import cutpoints, cutpoints_matrix, cutter
+
+from .common import SIZES, NUMERIC, check_size, make_frame
+
+
+class Cutpoints:
+    params = [SIZES, ['linear', 'log', 'quantile']]
+    param_names = ['n', 'cuts']
+    
+    def setup(self, n, cuts):
+        check_size(n)
+        x = make_frame(n)['num'].to_numpy()
+        self.x = x[~np.isnan(x)]
+        self.X = np.column_stack([self.x] * 8)
+        
+    def time_cutpoints(self, n, cuts):
+        cutpoints(self.x, cuts = cuts, ncuts = 20)
+        
+    def time_cutpoints_matrix(self, n, cuts):
+        cutpoints_matrix(self.X, cuts = cuts, ncuts = 20)
+        
+    def peakmem_cutpoints_matrix(self, n, cuts):
+        cutpoints_matrix(self.X, cuts = cuts, ncuts = 20)
+
+
+class Cutter:
+    params = [SIZES, NUMERIC]
+    param_names = ['n', 'x']
+    timeout = 600
+    
+    def setup(self, n, x):
+        check_size(n)
+        self.df = make_frame(n)
+        
+    def time_cutter(self, n, x):
+        cutter(self.df, x, max_levels = 20)
+        
+    def peakmem_cutter(self, n, x):
+        cutter(self.df, x, max_levels = 20)
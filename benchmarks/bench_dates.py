@@ -0,0 +1,19 @@
+from dsutils.utils.dates import bin_dates
+
+from .common import SIZES, check_size, make_frame
+
+
+class BinDates:
+    params = [SIZES, [True, False]]
+    param_names = ['n', 'midpoints']
+    timeout = 600
+    
+    def setup(self, n, midpoints):
+        check_size(n)
+        self.d = make_frame(n)['date']
+        
+    def time_bin_dates(self, n, midpoints):
+        bin_dates(self.d, bins = 10, midpoints = midpoints)
+        
+    def peakmem_bin_dates(self, n, midpoints):
+        bin_dates(self.d, bins = 10, midpoints = midpoints)
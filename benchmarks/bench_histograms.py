@@ -0,0 +1,38 @@
+from dsutils.utils.histograms import (
+    _numeric_histogram,
+    _categorical_histogram
+)
+
+from .common import SIZES, check_size, make_frame
+
+
+class NumericHistogram:
+    params = [SIZES, ['num', 'num_pm']]
+    param_names = ['n', 'x']
+    timeout = 600
+    
+    def setup(self, n, x):
+        check_size(n)
+        self.df = make_frame(n)
+        
+    def time_numeric_histogram(self, n, x):
+        _numeric_histogram(self.df, x, ['y'], max_levels = 20)
+        
+    def peakmem_numeric_histogram(self, n, x):
+        _numeric_histogram(self.df, x, ['y'], max_levels = 20)
+
+
+class CategoricalHistogram:
+    params = [SIZES, ['cat_low', 'cat_high']]
+    param_names = ['n', 'x']
+    timeout = 600
+    
+    def setup(self, n, x):
+        check_size(n)
+        self.df = make_frame(n)
+        
+    def time_categorical_histogram(self, n, x):
+        _categorical_histogram(self.df, x, ['y'], max_levels = 20)
+        
+    def peakmem_categorical_histogram(self, n, x):
+        _categorical_histogram(self.df, x, ['y'], max_levels = 20)
@@ -0,0 +1,39 @@
+from dsutils.pipeline import Pipeline
+from dsutils.transformers import (
+    MaxLevelBinner,
+    OutlierPercentileCapper,
+    NumericBinner,
+    DateComponents
+)
+
+from .common import SIZES, check_size, make_frame
+
+
+def make_pipeline(copy, n_jobs):
+    return(Pipeline([
+        ('cap', OutlierPercentileCapper('num', lower = 0.01, upper = 0.99)),
+        ('bin_num', NumericBinner(['num', 'num_pm'], max_levels = 20)),
+        ('bin_cat', MaxLevelBinner(['cat_low', 'cat_high'], max_levels = 20)),
+        ('dates', DateComponents('date'))
+    ], copy = copy, n_jobs = n_jobs))
+
+
+class PipelineSuite:
+    params = [SIZES, ['step', 'once'], [1, 4]]
+    param_names = ['n', 'copy', 'n_jobs']
+    timeout = 600
+    
+    def setup(self, n, copy, n_jobs):
+        check_size(n)
+        self.df = make_frame(n)
+        self.fitted = make_pipeline(copy, n_jobs)
+        self.fitted.fit(self.df)
+        
+    def time_fit_transform(self, n, copy, n_jobs):
+        make_pipeline(copy, n_jobs).fit_transform(self.df)
+        
+    def time_transform(self, n, copy, n_jobs):
+        self.fitted.transform(self.df)
+        
+    def peakmem_fit_transform(self, n, copy, n_jobs):
+        make_pipeline(copy, n_jobs).fit_transform(self.df)
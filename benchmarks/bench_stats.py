@@ -0,0 +1,25 @@
+from dsutils.utils.stats import (
+    cramers_corrected_matrix,
+    cramers_associations
+)
+
+from .common import SIZES, check_size, make_categorical_frame
+
+
+class CramersV:
+    params = [SIZES, [1, 4]]
+    param_names = ['n', 'n_jobs']
+    timeout = 900
+    
+    def setup(self, n, n_jobs):
+        check_size(n)
+        self.df = make_categorical_frame(n)
+        
+    def time_cramers_corrected_matrix(self, n, n_jobs):
+        cramers_corrected_matrix(self.df, n_jobs = n_jobs)
+        
+    def time_cramers_associations(self, n, n_jobs):
+        cramers_associations(self.df, top_k = 2, n_jobs = n_jobs)
+        
+    def peakmem_cramers_corrected_matrix(self, n, n_jobs):
+        cramers_corrected_matrix(self.df, n_jobs = n_jobs)
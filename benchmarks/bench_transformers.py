@@ -0,0 +1,69 @@
+from dsutils.transformers import (
+    MaxLevelBinner,
+    PercentThresholdBinner,
+    CumulativePercentThresholdBinner,
+    OutlierPercentileCapper,
+    NumericBinner,
+    DateComponents
+)
+
+from .common import SIZES, NUMERIC, CATEGORICAL, check_size, make_frame
+
+TRANSFORMERS = {
+    'MaxLevelBinner':
+        lambda: MaxLevelBinner(CATEGORICAL, max_levels = 20),
+    'MaxLevelBinner-sketch':
+        lambda: MaxLevelBinner(CATEGORICAL, max_levels = 20,
+                               sketch_size = 1000),
+    'PercentThresholdBinner':
+        lambda: PercentThresholdBinner(CATEGORICAL, percent_threshold = 0.01),
+    'CumulativePercentThresholdBinner':
+        lambda: CumulativePercentThresholdBinner(CATEGORICAL,
+                                                 cum_percent = 0.9),
+    'OutlierPercentileCapper':
+        lambda: OutlierPercentileCapper(NUMERIC, lower = 0.01, upper = 0.99),
+    'NumericBinner':
+        lambda: NumericBinner(NUMERIC, max_levels = 20),
+    'DateComponents':
+        lambda: DateComponents('date', components = {
+            'year': '_YEAR', 'month': '_MONTH', 'day': '_DAY',
+            'dayofweek': '_DOW'})
+}
+
+
+class Transformers:
+    params = [SIZES, list(TRANSFORMERS)]
+    param_names = ['n', 'transformer']
+    timeout = 600
+    
+    def setup(self, n, transformer):
+        check_size(n)
+        self.df = make_frame(n)
+        self.fitted = TRANSFORMERS[transformer]()
+        self.fitted.fit(self.df)
+        
+    def time_fit(self, n, transformer):
+        TRANSFORMERS[transformer]().fit(self.df)
+        
+    def time_transform(self, n, transformer):
+        self.fitted.transform(self.df)
+        
+    def time_transform_in_place(self, n, transformer):
+        self.fitted.transform(self.df.copy(), in_place = True)
+        
+    def peakmem_fit_transform(self, n, transformer):
+        TRANSFORMERS[transformer]().fit_transform(self.df)
+
+
+class TransformRecords:
+    params = [[1, 100], list(TRANSFORMERS)]
+    param_names = ['records', 'transformer']
+    
+    def setup(self, records, transformer):
+        df = make_frame(10**4)
+        self.fitted = TRANSFORMERS[transformer]()
+        self.fitted.fit(df)
+        self.records = df.iloc[:records].to_dict('records')
+        
+    def time_transform_records(self, records, transformer):
+        self.fitted.transform_records(self.records)
@@ -0,0 +1,82 @@
+"""
+Synthetic data shared by the benchmarks
+"""
+
+import os
+import functools
+import numpy as np
+import pandas as pd
+
+SIZES = [10**4, 10**5, 10**6, 10**7, 10**8]
+
+MAX_ROWS = int(float(os.environ.get('DSUTILS_BENCH_MAX_ROWS', 10**6)))
+
+NUMERIC = ['num', 'num_pm']
+CATEGORICAL = ['cat_low', 'cat_high']
+
+
+def check_size(n):
+    """
+    Skip sizes above DSUTILS_BENCH_MAX_ROWS; asv treats
+    NotImplementedError raised in setup as a skipped benchmark
+    """
+    if n > MAX_ROWS:
+        raise NotImplementedError("n exceeds DSUTILS_BENCH_MAX_ROWS")
+
+
+@functools.lru_cache(maxsize = 1)
+def make_frame(n, seed = 0):
+    """
+    DataFrame with n rows of:
+        'num' : lognormal, 2% missing
+        'num_pm' : normal with a 30% point mass at 0
+        'cat_low' : 20 levels with Zipf-like frequencies, 1% missing
+        'cat_high' : about n / 100 levels with Zipf-like frequencies
+        'date' : dates over 10 years, 1% missing
+        'y' : normal target
+    """
+    rng = np.random.default_rng(seed)
+    num = rng.lognormal(size = n)
+    num[rng.random(n) < 0.02] = np.nan
+    num_pm = np.where(rng.random(n) < 0.3, 0.0, rng.normal(size = n))
+    return(pd.DataFrame({
+        'num': num,
+        'num_pm': num_pm,
+        'cat_low': _zipf_strings(rng, n, 20, 0.01),
+        'cat_high': _zipf_strings(rng, n, max(n // 100, 20), 0.0),
+        'date': _dates(rng, n, 0.01),
+        'y': rng.normal(size = n)
+    }))
+
+
+def make_categorical_frame(n, p = 10, seed = 0):
+    """
+    DataFrame with n rows of p associated categorical columns with
+    between 2 and 30 levels
+    """
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 30, n)
+    cols = {}
+    for i in range(p):
+        k = int(rng.integers(2, 31))
+        noise = rng.integers(0, k, n)
+        codes = np.where(rng.random(n) < rng.random(), base % k, noise)
+        levels = np.array([str(j) for j in range(k)], dtype = object)
+        cols['c' + str(i)] = levels[codes]
+    return(pd.DataFrame(cols))
+
+
+def _zipf_strings(rng, n, levels, missing):
+    p = 1 / np.arange(1, levels + 1)
+    codes = rng.choice(levels, size = n, p = p / p.sum())
+    z = np.array(['L' + str(i) for i in range(levels)], dtype = object)[codes]
+    z[rng.random(n) < missing] = None
+    return(z)
+
+
+def _dates(rng, n, missing):
+    days = rng.integers(0, 3653, n)
+    d = np.datetime64('2015-01-01') + days.astype('timedelta64[D]')
+    d = d.astype('datetime64[ns]')
+    d[rng.random(n) < missing] = np.datetime64('NaT')
+    return(d)
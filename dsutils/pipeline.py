@@ -1,10 +1,129 @@
 import pandas as pd
 import numpy as np
+import os
+import re
+import hashlib
+import pickle
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from .transformers import BaseTransformer
+
+def _file_stem(name):
+    """
+    File name stem for a step name: characters that are not safe in
+    file names are replaced, and a hash of the name keeps names that
+    differ only in those characters apart
+    """
+    return(re.sub(r'[^A-Za-z0-9_.-]', '_', name) + '-' +
+           hashlib.blake2b(name.encode(), digest_size = 4).hexdigest())
+
+def _hash_value(h, v):
+    """
+    Feed a parameter value to hash h: numpy arrays and pandas objects
+    by their contents, as their repr elides long ones, containers item
+    by item, and anything else by its repr
+    """
+    if isinstance(v, np.ndarray):
+        h.update((str(v.dtype) + str(v.shape)).encode())
+        if v.dtype.kind in 'biufcmM':
+            h.update(np.ascontiguousarray(v).view(np.uint8))
+        else:
+            h.update(repr(v.tolist()).encode())
+    elif isinstance(v, (pd.Series, pd.Index)):
+        h.update((type(v).__name__ + str(v.dtype)).encode())
+        h.update(pd.util.hash_pandas_object(v).to_numpy())
+    elif isinstance(v, dict):
+        h.update(b'{')
+        for k, x in v.items():
+            _hash_value(h, k)
+            _hash_value(h, x)
+        h.update(b'}')
+    elif isinstance(v, (list, tuple)):
+        h.update(b'[' if isinstance(v, list) else b'(')
+        for x in v:
+            _hash_value(h, x)
+            h.update(b',')
+        h.update(b']')
+    else:
+        h.update(repr(v).encode())
 
 class Pipeline:
+    """
+    Chain of named transformation steps
+    
+    Parameters
+    ----------
+    steps : list of tuples
+        (name, transformer) pairs applied in order
+    
+    copy : str
+        'step' - every step copies its input and returns a new
+            DataFrame
+        'once' - the input DataFrame is copied once and every step
+            transforms that copy in place, so peak memory stays at
+            about one copy of the input plus the changed columns.
+            Steps that are not BaseTransformers have no in_place
+            argument and return a new DataFrame as with 'step'.
+    
+    n_jobs : int
+        If not 1, steps are grouped into waves using the input
+        columns (_x) and output columns each step declares: a step
+        waits for every earlier step whose outputs it reads or
+        writes, or whose inputs it overwrites. Steps in the same
+        wave are fitted and transformed concurrently in a thread
+        pool on just their input columns, and their output columns
+        are merged back. Steps that do not declare columns run
+        alone. -1 uses all cores.
+    
+    checkpoint : None, 'memory' or str
+        If not None, the input of every wave but the first during
+        fitting is kept (with n_jobs = 1, the output of every step but
+        the last), either in memory or pickled into the directory
+        given, so refit_from can re-run just a suffix of the pipeline
+    
+    cache_dir : None or str
+        If not None, fit fingerprints each step's input columns and
+        parameters and stores the fitted state in this directory.
+        A step whose fingerprint matches a stored state is loaded
+        instead of refitted; a step whose inputs or parameters
+        changed is reset and refitted.
+    
+    profile : boolean
+        If True, every fit and transform of a step records its wall
+        time, CPU time of the thread running it, input and output row
+        and column counts, and peak memory allocated above what was
+        in use when the step started (via tracemalloc, which slows
+        steps down while active). tracemalloc only tracks the
+        process-wide peak, so peak memory is missing for steps running
+        concurrently in a wave, and on Python < 3.9, where the peak
+        cannot be reset. See report.
+    
+    callbacks : None or list of callables
+        Each is called with the record of every fit and transform of a
+        step, e.g. to send it to a metrics system; implies profiling.
+        Steps running concurrently in a wave call them from their
+        worker threads, possibly at the same time, so they must be
+        thread-safe.
+    """
+    
+    _REPORT_COLUMNS = ['step', 'phase', 'wall_time', 'cpu_time', 'rows_in',
+                       'cols_in', 'rows_out', 'cols_out', 'peak_memory']
     
-    def __init__(self,steps):
+    def __init__(self,steps,copy = 'step',n_jobs = 1,checkpoint = None,
+                 cache_dir = None,profile = False,callbacks = None):
+        if copy not in ['step','once']:
+            raise ValueError("copy must be one of 'step' or 'once'")
         self._steps = steps
+        self._copy = copy
+        self._n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+        self._checkpoint = checkpoint
+        self._checkpoints = {}
+        self._cache_dir = cache_dir
+        self._profile = profile
+        self._callbacks = [] if callbacks is None else list(callbacks)
+        self._report = []
         self._validate_steps(steps)
         
     def _validate_steps(self, steps):
@@ -27,24 +146,328 @@ class Pipeline:
 #             raise ValueError(msg)
             
     def fit(self, df):
-        step_input = df
-        for step in self._steps:
-            self._fit_step(step, step_input)
-            step_input = self._transform_step(step,step_input)
+        self._run(df, fit = True)
+        
+    def _run(self, df, fit = False, steps = None, fit_steps = None):
+        """
+        Run steps (default: all) over df in waves, fitting them first
+        if fit is True. If fit_steps is given, only the steps named in
+        it are fitted and the others are just transformed.
+        """
+        if steps is None: steps = self._steps
+        self._report = []
+        if not self._profiling() or tracemalloc.is_tracing():
+            return(self._run_waves(df, fit, steps, fit_steps))
+        tracemalloc.start()
+        try:
+            return(self._run_waves(df, fit, steps, fit_steps))
+        finally:
+            tracemalloc.stop()
+        
+    def _run_waves(self, df, fit, steps, fit_steps):
+        step_input = self._copy_input(df)
+        for i, wave in enumerate(self._waves(steps)):
+            if fit and i > 0 and self._checkpoint is not None:
+                self._save_checkpoint([step[0] for step in wave], step_input)
+            fits = [fit and (fit_steps is None or step[0] in fit_steps)
+                    for step in wave]
+            if len(wave) == 1:
+                step = wave[0]
+                if fits[0]: self._fit_step(step, step_input)
+                step_input = self._transform_step(step, step_input)
+            else:
+                workers = min(self._n_jobs, len(wave))
+                with ThreadPoolExecutor(max_workers = workers) as ex:
+                    outputs = list(ex.map(
+                        lambda a: self._run_branch(a[0], step_input, a[1],
+                                                   workers == 1),
+                        zip(wave, fits)))
+                step_input = self._merge_outputs(step_input, outputs)
+        return(step_input)
+    
+    def _save_checkpoint(self, names, wave_input):
+        """
+        Keep the input of the wave made of the steps in names
+        """
+        if self._checkpoint == 'memory':
+            wave_input = wave_input.copy()
+        else:
+            os.makedirs(self._checkpoint, exist_ok = True)
+            path = os.path.join(self._checkpoint, _file_stem(names[0]) + '.pkl')
+            wave_input.to_pickle(path)
+            wave_input = path
+        for name in names:
+            self._checkpoints[name] = wave_input
             
-    def _fit_step(self,step,step_input):
+    def _load_checkpoint(self, name):
+        if name not in self._checkpoints:
+            raise ValueError("No checkpoint for step " + name)
+        if self._checkpoint == 'memory':
+            return(self._checkpoints[name].copy())
+        return(pd.read_pickle(self._checkpoints[name]))
+    
+    def refit_from(self, name, df = None):
+        """
+        Refit the pipeline from step 'name' onwards, starting from the
+        checkpointed input of the earliest wave holding one of these
+        steps (with n_jobs = 1, the output of the preceding step).
+        Steps before 'name' are not refitted; those in earlier waves
+        are not re-run either, and those in the same or later waves
+        are transformed again.
+        
+        Parameters
+        ----------
+        name : str
+            Name of the first step to refit
+        
+        df : pandas.DataFrame
+            Pipeline input; only needed if the refit starts from the
+            first wave
+        
+        Returns
+        -------
+        pandas.DataFrame output of the final step
+        """
+        names = [step[0] for step in self._steps]
+        i = names.index(name)
+        waves = self._waves(self._steps)
+        level = {step[0]: w for w, wave in enumerate(waves) for step in wave}
+        start = min(level[n] for n in names[i:])
+        if start > 0:
+            df = self._load_checkpoint(waves[start][0][0])
+        elif df is None:
+            raise ValueError("df is required to refit the first wave")
+        for step in self._steps[i:]:
+            if hasattr(step[1], '_reset'): step[1]._reset()
+        # waves of the remaining steps are those of the full pipeline
+        # from 'start' on, so the checkpoint holds exactly their input
+        return(self._run(
+            df, fit = True,
+            steps = [step for step in self._steps if level[step[0]] >= start],
+            fit_steps = set(names[i:])))
+    
+    def _run_branch(self, step, step_input, fit, measure_memory = True):
+        """
+        Fit and/or transform a step on just its input columns and
+        return its output columns; measure_memory is False if other
+        steps run at the same time. The input columns are copied, so
+        that in-place transforms under copy = 'once' write to a frame
+        of their own rather than to a view of the shared one.
+        """
+        inputs, outputs = self._step_columns(step)
+        branch_input = step_input[inputs].copy()
+        if fit: self._fit_step(step, branch_input, measure_memory)
+        return(self._transform_step(step, branch_input,
+                                    measure_memory)[outputs])
+    
+    def _merge_outputs(self, step_input, outputs):
+        cols = {c: out[c] for out in outputs for c in out.columns}
+        if self._copy != 'once':
+            step_input = step_input.copy()
+        for c, v in cols.items():
+            step_input[c] = v
+        return(step_input)
+    
+    def _step_columns(self, step):
+        """
+        Return the (input, output) column lists a step declares,
+        or None if it does not declare them
+        """
+        if not hasattr(step[1], '_x') or \
+                not hasattr(step[1], '_output_columns'):
+            return(None)
+        return(list(step[1]._x), list(step[1]._output_columns()))
+    
+    def _waves(self, steps):
+        """
+        Group steps into waves of mutually independent steps.
+        Waves run in order; steps within a wave may run concurrently.
+        """
+        if self._n_jobs is None or self._n_jobs <= 1:
+            return([[step] for step in steps])
+        cols = [self._step_columns(step) for step in steps]
+        levels = []
+        for i in range(len(steps)):
+            level = 0
+            for j in range(i):
+                if cols[i] is None or cols[j] is None or \
+                        self._depends(cols[i], cols[j]):
+                    level = max(level, levels[j] + 1)
+            levels.append(level)
+        waves = [[] for _ in range(max(levels, default = -1) + 1)]
+        for step, level in zip(steps, levels):
+            waves[level].append(step)
+        return(waves)
+    
+    @staticmethod
+    def _depends(a, b):
+        """
+        Whether a step with columns a must run after a step with
+        columns b
+        """
+        a_in, a_out = set(a[0]), set(a[1])
+        b_in, b_out = set(b[0]), set(b[1])
+        return(len(b_out & (a_in | a_out)) > 0 or len(b_in & a_out) > 0)
+            
+    def _profiling(self):
+        return(self._profile or len(self._callbacks) > 0)
+    
+    def _instrumented(self, phase, step, step_input, func,
+                      measure_memory = True):
+        """
+        Call func, which fits or transforms step on step_input, and
+        record its cost if profiling. The peak memory is left missing
+        unless measure_memory, as resetting the process-wide peak
+        would clobber that of steps running concurrently, and if
+        tracemalloc cannot reset it (Python < 3.9).
+        """
+        if not self._profiling():
+            return(func())
+        measure_memory = measure_memory and \
+            hasattr(tracemalloc, 'reset_peak')
+        if measure_memory:
+            tracemalloc.reset_peak()
+            mem_start = tracemalloc.get_traced_memory()[0]
+        wall, cpu = time.perf_counter(), time.thread_time()
+        step_output = func()
+        cpu = time.thread_time() - cpu
+        wall = time.perf_counter() - wall
+        peak = None
+        if measure_memory:
+            peak = max(tracemalloc.get_traced_memory()[1] - mem_start, 0)
+        shape = (None, None) if step_output is None else step_output.shape
+        record = dict(zip(self._REPORT_COLUMNS, [
+            step[0], phase, wall, cpu, step_input.shape[0],
+            step_input.shape[1], shape[0], shape[1], peak]))
+        self._report.append(record)
+        for callback in self._callbacks:
+            callback(record)
+        return(step_output)
+    
+    def report(self):
+        """
+        Records of the steps fitted and transformed by the latest call
+        to fit, transform, fit_transform or refit_from, when the
+        pipeline was created with profile = True or callbacks
+        
+        Returns
+        -------
+        pandas.DataFrame with one row per step and phase ('fit' or
+        'transform'): wall and thread CPU time in seconds, input and
+        output row and column counts (output counts are missing for
+        'fit') and peak memory in bytes (missing for steps that ran
+        concurrently in a wave and on Python < 3.9)
+        """
+        return(pd.DataFrame(self._report, columns = self._REPORT_COLUMNS)
+               .astype({'rows_out': 'Int64', 'cols_out': 'Int64',
+                        'peak_memory': 'Int64'}))
+            
+    def _fit_step(self,step,step_input,measure_memory = True):
+        self._instrumented('fit', step, step_input,
+                           lambda: self._fit_one(step, step_input),
+                           measure_memory)
+        
+    def _fit_one(self,step,step_input):
         #step[1].fit(step_input,step[2])
-        step[1].fit(step_input)
+        if self._cache_dir is None or not hasattr(step[1], '_get_state'):
+            step[1].fit(step_input)
+            return
+        path = os.path.join(
+            self._cache_dir,
+            _file_stem(step[0]) + '-' + self._fingerprint(step, step_input)
+            + '.pkl')
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                step[1]._set_state(pickle.load(f))
+        else:
+            step[1]._reset()
+            step[1].fit(step_input)
+            os.makedirs(self._cache_dir, exist_ok = True)
+            with open(path + '.tmp', 'wb') as f:
+                pickle.dump(step[1]._get_state(training = True), f)
+            os.replace(path + '.tmp', path)
+            
+    def _fingerprint(self, step, step_input):
+        """
+        Hash of a step's class, parameters and input columns
+        """
+        h = hashlib.blake2b(digest_size = 16)
+        h.update(type(step[1]).__qualname__.encode())
+        _hash_value(h, step[1]._get_params())
+        cols = getattr(step[1], '_x', step_input.columns)
+        h.update(str(step_input.shape[0]).encode())
+        for c in cols:
+            h.update((str(c) + str(step_input[c].dtype)).encode())
+            values = step_input[c].to_numpy()
+            if values.dtype.kind in 'biufcmM':
+                h.update(np.ascontiguousarray(values).view(np.uint8))
+            else:
+                h.update(pd.util.hash_pandas_object(
+                    step_input[c], index = False).to_numpy())
+        return(h.hexdigest())
+        
+    def _transform_step(self,step,step_input,measure_memory = True):
+        return(self._instrumented('transform', step, step_input,
+                                  lambda: self._transform_one(step, step_input),
+                                  measure_memory))
         
-    def _transform_step(self,step,step_input):
+    def _transform_one(self,step,step_input):
+        if self._copy == 'once' and isinstance(step[1], BaseTransformer):
+            step_output = step[1].transform(step_input, in_place = True)
+            return(step_input if step_output is None else step_output)
         return(step[1].transform(step_input))
     
+    def _copy_input(self, df):
+        if self._copy == 'once':
+            return(df.copy())
+        return(df)
+    
     def transform(self, df):
-        step_input = df
+        return(self._run(df))
+    
+    def transform_records(self, records):
+        """
+        Transform a list of records without building DataFrames,
+        for low-latency scoring of single records or micro-batches.
+        Steps without a record path fall back to a DataFrame round trip.
+        
+        Parameters
+        ----------
+        records : list of dicts mapping column names to values
+        
+        Returns
+        -------
+        list of new, transformed dicts
+        """
+        records = [dict(r) for r in records]
         for step in self._steps:
-            step_input = self._transform_step(step, step_input)
-        return(step_input)
+            if hasattr(step[1], '_transform_records'):
+                if not step[1]._check_if_fit():
+                    raise Exception("Transformation not fit yet")
+                records = step[1]._transform_records(records)
+            else:
+                records = step[1].transform(pd.DataFrame(records)) \
+                                 .to_dict('records')
+        return(records)
+    
+    def transform_row(self, row):
+        """
+        Transform a single record, see transform_records
+        """
+        return(self.transform_records([row])[0])
+    
+    def save(self, path, training_state = False):
+        """
+        Save the pipeline and the fitted state of its steps to
+        directory 'path'. Load it with dsutils.serialization.load.
+        See dsutils.serialization.save for training_state.
+        """
+        from .serialization import save
+        save(self, path, training_state)
     
     def fit_transform(self, df):
-        self.fit(df)
-        return(self.transform(df))
\ No newline at end of file
+        """
+        Fit all steps and return the output of the fitting pass, so
+        no step is transformed twice
+        """
+        return(self._run(df, fit = True))
\ No newline at end of file
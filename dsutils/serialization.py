@@ -0,0 +1,205 @@
+"""
+Save and load fitted transformers and pipelines.
+
+A saved object is a directory holding a JSON manifest with the
+parameters and small pieces of fitted state, plus one .npy file per
+array (category tables, counts, ...). Numeric arrays are memory-mapped
+by load: worker processes start without parsing them and share one copy
+through the page cache. String arrays are stored with a fixed-width
+unicode dtype, 4 bytes per character of their longest string, so a
+single long level widens the whole file; they are memory-mapped too,
+but a categorical binner copies its string categories into a pandas
+Index when it first transforms, so these are neither shared between
+processes nor kept out of memory. Arrays of mixed Python objects, and
+objects without an array representation (e.g. quantile sketches), fall
+back to pickle and are read into memory. Only load files you trust.
+"""
+
+import os
+import json
+import pickle
+import importlib
+import numpy as np
+import pandas as pd
+
+from .pipeline import Pipeline
+
+_FORMAT_VERSION = 1
+
+
+def save(obj, path, training_state = False):
+    """
+    Save a fitted transformer or Pipeline
+
+    Parameters
+    ----------
+    obj : BaseTransformer or Pipeline
+
+    path : str
+        Directory to write; created if it does not exist
+
+    training_state : boolean
+        If True, also save state only needed to resume partial_fit,
+        such as level counts and quantile sketches. By default only
+        what transform needs is saved.
+    """
+    os.makedirs(os.path.join(path, 'arrays'), exist_ok = True)
+    writer = _Writer(path)
+    if isinstance(obj, Pipeline):
+        manifest = {
+            'type': 'pipeline',
+            'params': writer.encode({
+                'copy': obj._copy,
+                'n_jobs': obj._n_jobs,
+                'checkpoint': obj._checkpoint,
+                'cache_dir': obj._cache_dir,
+                'profile': obj._profile}),
+            'steps': [[name, _encode_transformer(step, writer, training_state)]
+                      for name, step in obj._steps]
+        }
+    else:
+        manifest = {
+            'type': 'transformer',
+            'transformer': _encode_transformer(obj, writer, training_state)
+        }
+    manifest['version'] = _FORMAT_VERSION
+    with open(os.path.join(path, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f)
+
+
+def load(path, mmap = True):
+    """
+    Load a transformer or Pipeline written by save
+
+    Parameters
+    ----------
+    path : str
+        Directory written by save
+
+    mmap : boolean
+        If True, memory-map arrays instead of reading them
+
+    Returns
+    -------
+    BaseTransformer or Pipeline
+    """
+    with open(os.path.join(path, 'manifest.json'), 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != _FORMAT_VERSION:
+        raise ValueError("Unsupported format version: " +
+                         str(manifest.get('version')))
+    reader = _Reader(path, mmap)
+    if manifest['type'] == 'pipeline':
+        steps = [(name, _decode_transformer(t, reader))
+                 for name, t in manifest['steps']]
+        return(Pipeline(steps, **reader.decode(manifest['params'])))
+    return(_decode_transformer(manifest['transformer'], reader))
+
+
+def _encode_transformer(obj, writer, training_state = False):
+    if not hasattr(obj, '_get_state'):
+        raise TypeError(type(obj).__name__ + " cannot be saved")
+    cls = type(obj)
+    return({
+        'class': cls.__module__ + ':' + cls.__qualname__,
+        'params': writer.encode(obj._get_params()),
+        'state': writer.encode(obj._get_state(training_state))
+    })
+
+
+def _decode_transformer(d, reader):
+    module, name = d['class'].split(':')
+    cls = getattr(importlib.import_module(module), name)
+    obj = cls.__new__(cls)
+    obj.__dict__.update(reader.decode(d['params']))
+    obj._set_state(reader.decode(d['state']))
+    return(obj)
+
+
+class _Writer:
+    """
+    Encode values as JSON, writing arrays to .npy files
+    """
+    def __init__(self, path):
+        self._path = path
+        self._n = 0
+
+    def encode(self, v):
+        if v is None or isinstance(v, (bool, str)):
+            return(v)
+        if isinstance(v, (int, float, np.generic)) and np.ndim(v) == 0 \
+                and not isinstance(v, np.datetime64):
+            return(v.item() if isinstance(v, np.generic) else v)
+        if isinstance(v, dict):
+            return({'__dict__': [[self.encode(k), self.encode(x)]
+                                 for k, x in v.items()]})
+        if isinstance(v, (list, tuple)):
+            return({'__list__': [self.encode(x) for x in v]})
+        if isinstance(v, np.ndarray):
+            return(self._write_array(v))
+        if isinstance(v, pd.Series):
+            return({'__series__': [self.encode(v.index.to_numpy()),
+                                   self.encode(v.to_numpy()),
+                                   self.encode(v.index.name)]})
+        return(self._write_pickle(v))
+
+    def _next_file(self, ext):
+        name = os.path.join('arrays', str(self._n).zfill(6) + ext)
+        self._n += 1
+        return(name)
+
+    def _write_array(self, v):
+        if v.dtype == object and len(v) > 0:
+            # store homogeneous object arrays with a fixed-width dtype
+            inferred = pd.api.types.infer_dtype(v, skipna = False)
+            if inferred == 'string':
+                v = v.astype(str)
+            elif inferred == 'integer':
+                v = v.astype(np.int64)
+            elif inferred in ['floating', 'mixed-integer-float']:
+                v = v.astype(float)
+        name = self._next_file('.npy')
+        np.save(os.path.join(self._path, name), v,
+                allow_pickle = v.dtype == object)
+        return({'__array__': name, 'mmap': v.dtype != object})
+
+    def _write_pickle(self, v):
+        name = self._next_file('.pkl')
+        with open(os.path.join(self._path, name), 'wb') as f:
+            pickle.dump(v, f)
+        return({'__pickle__': name})
+
+
+class _Reader:
+    """
+    Decode values written by _Writer
+    """
+    def __init__(self, path, mmap):
+        self._path = path
+        self._mmap = mmap
+
+    def decode(self, v):
+        if not isinstance(v, dict):
+            return(v)
+        if '__dict__' in v:
+            return({self._key(self.decode(k)): self.decode(x)
+                    for k, x in v['__dict__']})
+        if '__list__' in v:
+            return([self.decode(x) for x in v['__list__']])
+        if '__array__' in v:
+            return(np.load(
+                os.path.join(self._path, v['__array__']),
+                mmap_mode = 'r' if self._mmap and v['mmap'] else None,
+                allow_pickle = not v['mmap']))
+        if '__series__' in v:
+            index, values, name = [self.decode(x) for x in v['__series__']]
+            return(pd.Series(values, index = pd.Index(index, name = name)))
+        if '__pickle__' in v:
+            with open(os.path.join(self._path, v['__pickle__']), 'rb') as f:
+                return(pickle.load(f))
+        raise ValueError("Unknown encoded value")
+
+    @staticmethod
+    def _key(k):
+        # lists decode from tuples used as dict keys
+        return(tuple(k) if isinstance(k, list) else k)
@@ -7,6 +7,8 @@ from ._categorical_binners import CumulativePercentThresholdBinner
 
 from ._numeric_transformers import OutlierPercentileCapper
 
+from ._numeric_binners import NumericBinner
+
 # from ._missing_transformers import BaseMissingTransformer
 # from ._missing_transformers import MissingIndicator
 # from ._missing_transformers import ReplaceMissingMean
@@ -33,5 +35,7 @@ __all__ = [
     # _date_transformers
     'DateComponents',
     # _numeric_transformers
-    'OutlierPercentileCapper'
+    'OutlierPercentileCapper',
+    # _numeric_binners
+    'NumericBinner'
 ]
\ No newline at end of file
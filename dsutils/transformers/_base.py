@@ -1,15 +1,33 @@
 import numpy as np
 import pandas as pd
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union
 
+def _is_missing(v):
+    """
+    Whether a scalar is a missing value (None, NaN, NaT or pd.NA)
+    """
+    return(v is None or v is pd.NA or v is pd.NaT or
+           (isinstance(v, (float, np.floating, np.datetime64)) and
+            np.isnan(v)))
+
 class BaseTransformer:
     """
     Base class for all transformers
     """
     
-    def __init__(self,x: Union[str,list]):
+    # attributes holding fitted state; all others are parameters
+    _state_attrs = ['_fitted']
+    
+    # fitted state only needed to resume partial fitting, e.g. level
+    # counts or quantile sketches; saved only on request
+    _training_attrs = []
+    
+    def __init__(self,x: Union[str,list], n_jobs = 1):
         if isinstance(x,str): x = [x]
         self._x = x
+        self._n_jobs = n_jobs
         self._fitted = False
         
     def _reset(self):
@@ -18,6 +36,62 @@ class BaseTransformer:
     def _check_if_fit(self):
         return(self._fitted)
     
+    def _get_params(self):
+        return({k: v for k, v in vars(self).items()
+                if k not in self._state_attrs + self._training_attrs})
+    
+    def _get_state(self, training = False):
+        attrs = self._state_attrs + (self._training_attrs if training else [])
+        return({k: getattr(self, k) for k in attrs})
+    
+    def _set_state(self, state):
+        # training state left out of 'state' is marked as unavailable
+        for k in self._training_attrs:
+            setattr(self, k, None)
+        for k, v in state.items():
+            setattr(self, k, v)
+            
+    def _check_training_state(self):
+        if any(getattr(self, k) is None for k in self._training_attrs):
+            raise Exception("Training state was not saved; " +
+                            "partial fitting cannot be resumed")
+            
+    def save(self, path, training_state = False):
+        """
+        Save the transformer and its fitted state to directory 'path'.
+        Load it with dsutils.serialization.load. If training_state is
+        True, state only needed to resume partial_fit (e.g. level
+        counts) is saved too.
+        """
+        from ..serialization import save
+        save(self, path, training_state)
+    
+    def _output_columns(self):
+        """
+        Columns written by transform. Defaults to the input columns,
+        which most transformers overwrite.
+        """
+        return(self._x)
+    
+    def _map_columns(self, func, cols = None):
+        """
+        Apply func to each column name in cols (default: the
+        transformer's columns). If n_jobs is not 1, columns are
+        processed concurrently in a thread pool; threads share the
+        DataFrame's memory, so no column data is copied or pickled.
+        n_jobs = -1 uses all available cores.
+        
+        Returns
+        -------
+        dict mapping column name to the result of func
+        """
+        if cols is None: cols = self._x
+        n_jobs = os.cpu_count() if self._n_jobs == -1 else self._n_jobs
+        if n_jobs is None or n_jobs <= 1 or len(cols) < 2:
+            return({z: func(z) for z in cols})
+        with ThreadPoolExecutor(max_workers = min(n_jobs, len(cols))) as ex:
+            return(dict(zip(cols, ex.map(func, cols))))
+    
     def _validate_x(self, df, x, dtypes):
         if len(x) == 1:
             self._validate_one(df, x, dtypes)
@@ -46,6 +120,45 @@ class BaseTransformer:
         else:
             return(self.transform(df, in_place))
         
+    def transform_records(self, records):
+        """
+        Transform a list of records without building a DataFrame,
+        for low-latency scoring of single records or micro-batches
+        
+        Parameters
+        ----------
+        records : list of dicts mapping column names to values
+        
+        Returns
+        -------
+        list of new, transformed dicts
+        """
+        if not self._fitted:
+            raise Exception("Transformation not fit yet")
+        return(self._transform_records([dict(r) for r in records]))
+    
+    def transform_row(self, row):
+        """
+        Transform a single record, see transform_records
+        
+        Parameters
+        ----------
+        row : dict mapping column names to values
+        
+        Returns
+        -------
+        new, transformed dict
+        """
+        return(self.transform_records([row])[0])
+    
+    def _transform_records(self, records):
+        """
+        Transform a list of dicts that may be modified in place.
+        Transformers without a record path fall back to a DataFrame
+        round trip.
+        """
+        return(self.transform(pd.DataFrame(records)).to_dict('records'))
+        
     def _validate_one(self, df, x, dtypes):
         if not x in df.columns:
             raise ValueError(x + " is not a column in the DataFrame")
@@ -1,16 +1,160 @@
 import pandas as pd
 import numpy as np
 from typing import Union
-from ._base import BaseTransformer
+from ._base import BaseTransformer, _is_missing
+from ..utils.sketches import misra_gries_reduce
 
 class _CategoricalBinner(BaseTransformer):
     """
     Base class for all categorical binnning transformers
     """
-    def __init__(self, x = Union[str,list]):
-        super(_CategoricalBinner, self).__init__(x)
+    _state_attrs = ['_fitted', '_level_map', '_dtypes', '_categories']
+    _training_attrs = ['_counts', '_n']
+    
+    def __init__(self, x = Union[str,list], n_jobs = 1):
+        super(_CategoricalBinner, self).__init__(x, n_jobs)
         self._map = {}
+        self._dtypes = {}
+        self._categories = {}
+        self._counts = {}
+        self._n = 0
         self._other_val = None
+        self._sketch_size = None
+        
+    # rows per block when fitting a sketch on a single DataFrame
+    _sketch_block_size = 1000000
+        
+    def _reset(self):
+        self._fitted = False
+        self._map = {}
+        self._dtypes = {}
+        self._categories = {}
+        self._counts = {}
+        self._n = 0
+        
+    @property
+    def _map(self):
+        """
+        Retained levels of each column, as a dict mapping each level
+        to itself. A loaded binner rebuilds it from its categories on
+        first use.
+        """
+        if self._level_map is None:
+            self._level_map = {
+                z: {l:l for l in self._dtype(z).categories
+                    if l != self._other_val}
+                for z in self._x}
+        return(self._level_map)
+    
+    @_map.setter
+    def _map(self, level_map):
+        self._level_map = level_map
+        
+    def _dtype(self, z):
+        """
+        Categorical dtype of column z. A loaded binner builds it from
+        the saved category table on first use, so loading stays cheap
+        and numeric category tables remain memory-mapped.
+        """
+        if z not in self._dtypes:
+            self._dtypes[z] = pd.CategoricalDtype(
+                pd.Index(self._categories[z], copy = False))
+        return(self._dtypes[z])
+        
+    def fit(self, df):
+        """
+        Fit method
+        
+        Parameters
+        ----------
+        df : pandas.DataFrame
+        """
+        if self._fitted: return
+        if self._sketch_size is None:
+            self._update_counts(df)
+        else:
+            for i in range(0, df.shape[0], self._sketch_block_size):
+                self._update_counts(df.iloc[i:i+self._sketch_block_size])
+        self._finalize()
+        
+    def partial_fit(self, df):
+        """
+        Update the fitted levels with a chunk of data. Level counts
+        are merged across calls, so fitting chunk by chunk yields the
+        same levels as a single fit on the concatenated chunks.
+        
+        Parameters
+        ----------
+        df : pandas.DataFrame
+        """
+        self._update_counts(df)
+        self._finalize()
+        
+    def fit_iter(self, dfs):
+        """
+        Fit on an iterable of DataFrames, e.g. the reader returned by
+        pandas.read_csv(..., chunksize = n)
+        
+        Parameters
+        ----------
+        dfs : iterable of pandas.DataFrame
+        """
+        if self._fitted: return
+        for df in dfs:
+            self._update_counts(df)
+        self._finalize()
+        
+    def _get_state(self, training = False):
+        # transform only needs the category table of each column
+        state = {
+            '_fitted': self._fitted,
+            '_categories': {z: self._dtype(z).categories.to_numpy()
+                            for z in self._x} if self._fitted else {}
+        }
+        if training:
+            state['_counts'] = self._counts
+            state['_n'] = self._n
+        return(state)
+    
+    def _set_state(self, state):
+        super(_CategoricalBinner, self)._set_state(state)
+        self._dtypes = {}
+        self._level_map = None
+        
+    def _update_counts(self, df):
+        """
+        Merge the level counts of df into the running counts
+        """
+        self._check_training_state()
+        def _count(z):
+            cnts = df.groupby(z,dropna=False).size()
+            if z in self._counts:
+                cnts = pd.concat([self._counts[z],cnts]) \
+                         .groupby(level=0,dropna=False).sum() \
+                         .rename_axis(z)
+            if self._sketch_size is not None:
+                cnts = misra_gries_reduce(cnts, self._sketch_size)
+            return(cnts)
+        self._counts.update(self._map_columns(_count))
+        self._n += df.shape[0]
+        
+    def _finalize(self):
+        for z in self._x:
+            levels = self._levels(self._counts[z], self._n)
+            self._map[z] = {l:l for l in levels}
+        self._compile()
+        self._fitted = True
+        
+    def _compile(self):
+        """
+        Compile each fitted level map into a fixed categorical dtype.
+        Retained levels come first, followed by the other value.
+        """
+        for z in self._x:
+            levels = [l for l in self._map[z] if not pd.isna(l)]
+            if self._other_val not in levels:
+                levels.append(self._other_val)
+            self._dtypes[z] = pd.CategoricalDtype(levels)
         
     def transform(self, df, in_place = False):
         """
@@ -25,94 +169,156 @@ class _CategoricalBinner(BaseTransformer):
         Returns
         -------
         None if in_place is True
-        pandas.DataFrame if in_place is False
+        pandas.DataFrame if in_place is False. Transformed
+        columns are of dtype category; missing values stay missing
+        and unseen levels are coded as the other value.
         """
         if not self._fitted:
             raise Exception("Transformation not fit yet")
         if not in_place:
             df = df.copy()
-        for z in self._x:
-            df.loc[-df[z].isna(),z] = df.loc[-df[z].isna(),z] \
-                .map(self._map[z]).fillna(self._other_val)
+        def _bin(z):
+            dtype = self._dtype(z)
+            codes = dtype.categories.get_indexer(df[z])
+            codes[(codes == -1) & df[z].notna().values] = \
+                dtype.categories.get_loc(self._other_val)
+            return(pd.Categorical.from_codes(codes, dtype = dtype))
+        for z, v in self._map_columns(_bin).items():
+            df[z] = v
         if not in_place: return(df)
+        
+    def _transform_records(self, records):
+        for z in self._x:
+            levels, other_val = self._map[z], self._other_val
+            for r in records:
+                v = r[z]
+                if not _is_missing(v) and v not in levels:
+                    r[z] = other_val
+        return(records)
 
         
 class MaxLevelBinner(_CategoricalBinner):
     """
     MaxLevelBinner
+    
+    Parameters
+    ----------
+    x : str or list
+        Variable(s) to bin
+    
+    max_levels : int
+        Number of most frequent levels to retain
+    
+    other_val : str
+        Value given to all other levels
+    
+    sketch_size : int or None
+        If None, fit on exact level counts. Otherwise keep a
+        Misra-Gries summary of at most sketch_size counters per
+        column. Any level with frequency above 1 / (sketch_size + 1)
+        is guaranteed to be tracked and its count is underestimated
+        by at most that fraction of the records.
+    
+    n_jobs : int
+        Number of threads used to fit and transform columns
+        concurrently; -1 uses all cores
     """
-    def __init__(self, x: Union[str,list], max_levels = 20, other_val = '_OTHER_'):
-        super(MaxLevelBinner, self).__init__(x)
+    def __init__(self, x: Union[str,list], max_levels = 20, other_val = '_OTHER_',
+                 sketch_size = None, n_jobs = 1):
+        super(MaxLevelBinner, self).__init__(x, n_jobs)
+        if sketch_size is not None and sketch_size < max_levels:
+            raise ValueError("sketch_size must be at least max_levels")
         self._max_levels = max_levels
         self._other_val = other_val
+        self._sketch_size = sketch_size
         
-    def fit(self, df):
+    def _levels(self, cnts, n):
         """
-        Fit method
+        Retain the max_levels most frequent levels
         
         Parameters
         ----------
-        df : pandas.DataFrame
+        cnts : pandas.Series of level counts
+        
+        n : int, number of records counted
         """
-        if self._fitted: return
-        for z in self._x:
-            cnts = df.groupby(z,dropna=False).size() \
-                     .sort_values(ascending = False) \
-                     .head(self._max_levels)
-            levels = cnts.index.tolist()
-            self._map[z] = {l:l for l in levels}
-        self._fitted = True
+        cnts = cnts.sort_values(ascending = False) \
+                   .head(self._max_levels)
+        return(cnts.index.tolist())
 
         
 class PercentThresholdBinner(_CategoricalBinner):
     """
     PercentThresholdBinner
+    
+    Parameters
+    ----------
+    x : str or list
+        Variable(s) to bin
+    
+    percent_threshold : float
+        Levels with at least this frequency are retained
+    
+    other_val : str
+        Value given to all other levels
+    
+    sketch_size : int or None
+        If None, fit on exact level counts. Otherwise keep a
+        Misra-Gries summary of at most sketch_size counters per
+        column. Estimated counts never exceed true counts, so no
+        level below percent_threshold is retained, and every level
+        with frequency of at least
+        percent_threshold + 1 / (sketch_size + 1) is retained.
+    
+    n_jobs : int
+        Number of threads used to fit and transform columns
+        concurrently; -1 uses all cores
     """
-    def __init__(self, x: Union[str,list], percent_threshold = 0.02, other_val = '_OTHER_'):
-        super(PercentThresholdBinner, self).__init__(x)
+    def __init__(self, x: Union[str,list], percent_threshold = 0.02, other_val = '_OTHER_',
+                 sketch_size = None, n_jobs = 1):
+        super(PercentThresholdBinner, self).__init__(x, n_jobs)
         self._percent_threshold = percent_threshold
         self._other_val = other_val
+        self._sketch_size = sketch_size
         
-    def fit(self, df):
+    def _levels(self, cnts, n):
         """
-        Fit method
+        Retain levels with frequency of at least percent_threshold
         
         Parameters
         ----------
-        df : pandas.DataFrame
+        cnts : pandas.Series of level counts
+        
+        n : int, number of records counted
         """
-        if self._fitted: return
-        for z in self._x:
-            cnts = (df.groupby(z,dropna=False).size() / df.shape[0])
-            levels = cnts[cnts>=self._percent_threshold].index.tolist()
-            self._map[z] = {l:l for l in levels}
-        self._fitted = True
+        cnts = cnts / n
+        return(cnts[cnts>=self._percent_threshold].index.tolist())
         
         
 class CumulativePercentThresholdBinner(_CategoricalBinner):
     """
     CumulativePercentThresholdBinner
     """
-    def __init__(self, x: Union[str,list], cum_percent = 0.95, other_val = '_OTHER_'):
-        super(CumulativePercentThresholdBinner, self).__init__(x)
+    def __init__(self, x: Union[str,list], cum_percent = 0.95, other_val = '_OTHER_',
+                 n_jobs = 1):
+        super(CumulativePercentThresholdBinner, self).__init__(x, n_jobs)
         self._cum_percent = cum_percent
         self._other_val = other_val
         
-    def fit(self, df):
+    def _levels(self, cnts, n):
         """
-        Fit method
+        Retain the most frequent levels up to cumulative frequency
         
         Parameters
         ----------
-        df : pandas.DataFrame
+        cnts : pandas.Series of level counts
+        
+        n : int, number of records counted
         """
-        if self._fitted: return
-        for z in self._x:
-            cnts = (df.groupby(z,dropna=False).size() / df.shape[0]) \
-                      .to_frame(name = z + '_perc').reset_index() \
-                      .sort_values([z + '_perc',z], ascending = [False,True]) \
-                      .set_index(z) \
-                      .cumsum().shift(periods=1, fill_value=0)
-            levels = cnts[cnts[z + '_perc']<=0.85].index.tolist()
-            self._map[z] = {l:l for l in levels}
-        self._fitted = True
\ No newline at end of file
+        z = cnts.index.name
+        cnts = (cnts / n) \
+                  .to_frame(name = z + '_perc').reset_index() \
+                  .sort_values([z + '_perc',z], ascending = [False,True]) \
+                  .set_index(z) \
+                  .cumsum().shift(periods=1, fill_value=0)
+        return(cnts[cnts[z + '_perc']<=0.85].index.tolist())
@@ -1,15 +1,155 @@
 import pandas as pd
 import numpy as np
 from typing import Union
-from ._base import BaseTransformer
+from ._base import BaseTransformer, _is_missing
+
+# component extractors for single datetime values
+_RECORD_COMPONENTS = {
+    'year': lambda d: d.year,
+    'month': lambda d: d.month,
+    'day': lambda d: d.day,
+    'dayofweek': lambda d: d.weekday(),
+    'dayofyear': lambda d: d.timetuple().tm_yday,
+    'quarter': lambda d: (d.month - 1) // 3 + 1,
+    'hour': lambda d: d.hour,
+    'epoch_days': lambda d: d.toordinal() - 719163
+}
+
+# output dtypes of the vectorized extractor
+_COMPONENT_DTYPES = {
+    'year': np.int16,
+    'month': np.int8,
+    'day': np.int8,
+    'dayofweek': np.int8,
+    'dayofyear': np.int16,
+    'quarter': np.int8,
+    'hour': np.int8,
+    'epoch_days': np.int32
+}
+
+_UNITS_PER_SECOND = {'s': 1, 'ms': 10**3, 'us': 10**6, 'ns': 10**9}
+
+
+def _civil_from_days(days):
+    """
+    Convert days since 1970-01-01 to calendar components with the
+    civil-from-days algorithm of H. Hinnant
+    (http://howardhinnant.github.io/date_algorithms.html)
+    
+    Parameters
+    ----------
+    days : numpy int64 array
+    
+    Returns
+    -------
+    dict of numpy int64 arrays
+    """
+    # shift the epoch to 0000-03-01 and split into 400-year eras
+    z = days + 719468
+    era = z // 146097
+    doe = z - era * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    mp = (5 * doy + 2) // 153
+    month = np.where(mp < 10, mp + 3, mp - 9)
+    year = yoe + era * 400 + (month <= 2)
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    return({
+        'year': year,
+        'month': month,
+        'day': doy - (153 * mp + 2) // 5 + 1,
+        'dayofweek': (days + 3) % 7,
+        'dayofyear': np.where(mp < 10, doy + 60 + leap, doy - 305),
+        'quarter': (month - 1) // 3 + 1,
+        'epoch_days': days
+    })
+
+
+def _date_components(d, components):
+    """
+    Extract calendar components from a datetime64 Series in one pass
+    over its int64 buffer. When the values span fewer distinct days
+    than there are rows, components are computed once per day of the
+    span and gathered with a single take. Timezone-aware values use
+    local wall time.
+    
+    Parameters
+    ----------
+    d : pandas.Series of dtype datetime64
+    
+    components : iterable of keys of _COMPONENT_DTYPES
+    
+    Returns
+    -------
+    dict mapping component to array. If d contains NaT, arrays are
+    nullable pandas integer arrays, otherwise numpy arrays.
+    """
+    if getattr(d.dt, 'tz', None) is not None:
+        d = d.dt.tz_localize(None)
+    vals = d.to_numpy()
+    per_sec = _UNITS_PER_SECOND[np.datetime_data(vals.dtype)[0]]
+    missing = np.isnat(vals)
+    ints = np.where(missing, 0, vals.view(np.int64))
+    days = ints // (per_sec * 86400)
+    if missing.any() and not missing.all():
+        # keep the span of days tight around the observed values
+        days[missing] = days[~missing][0]
+    res = {}
+    cal_components = [c for c in components if c != 'hour']
+    if len(cal_components) > 0:
+        dmin, dmax = (days.min(), days.max()) if len(days) else (0, -1)
+        if dmax - dmin < len(days):
+            table = _civil_from_days(np.arange(dmin, dmax + 1))
+            idx = days - dmin
+            for c in cal_components:
+                res[c] = table[c].astype(_COMPONENT_DTYPES[c]).take(idx)
+        else:
+            cal = _civil_from_days(days)
+            for c in cal_components:
+                res[c] = cal[c].astype(_COMPONENT_DTYPES[c])
+    if 'hour' in components:
+        res['hour'] = (ints // (per_sec * 3600) % 24).astype(np.int8)
+    if missing.any():
+        for c, v in res.items():
+            v = pd.array(v, dtype = str(v.dtype).capitalize())
+            v[missing] = pd.NA
+            res[c] = v
+    return({c: res[c] for c in components})
+
 
 class DateComponents(BaseTransformer):
+    """
+    Extract calendar components from datetime columns
+    
+    Parameters
+    ----------
+    x : str or list
+        Datetime variable(s)
+    
+    components : dict
+        Maps component to the postfix of its new column. Components
+        are 'year', 'month', 'day', 'dayofweek' (Monday = 0),
+        'dayofyear', 'quarter', 'hour' and 'epoch_days' (days since
+        1970-01-01). Components are emitted as int8/int16/int32, or
+        the nullable equivalents if a column contains NaT.
+    
+    n_jobs : int
+        Number of threads used to transform columns concurrently
+    """
 
     def __init__(self, x : Union[str,list],
-                 components = {'year':'_YEAR','month':'_MONTH','day':'_DAY'}):
-        super(DateComponents, self).__init__(x)
+                 components = {'year':'_YEAR','month':'_MONTH','day':'_DAY'},
+                 n_jobs = 1):
+        super(DateComponents, self).__init__(x, n_jobs)
+        unknown = set(components) - set(_COMPONENT_DTYPES)
+        if len(unknown) > 0:
+            raise ValueError("Unknown components: " +
+                             ", ".join(sorted(unknown)))
         self._components = components
         
+    def _output_columns(self):
+        return([z + pf for z in self._x for pf in self._components.values()])
+        
     def fit(self, df):
         if self._fitted: return
         self._fitted = True
@@ -19,14 +159,25 @@ class DateComponents(BaseTransformer):
             raise Exception("Transformation not fit yet")
         if not in_place:
             df = df.copy()
-        for z in self._x:
-            if 'year' in self._components.keys():
-                pf = self._components['year']
-                df.loc[:,z+pf] = df[z].dt.year
-            if 'month' in self._components.keys():
-                pf = self._components['month']
-                df.loc[:,z+pf] = df[z].dt.month
-            if 'day' in self._components.keys():
-                pf = self._components['day']
-                df.loc[:,z+pf] = df[z].dt.day
-        if not in_place: return(df)
\ No newline at end of file
+        def _components(z):
+            return(_date_components(df[z], self._components.keys()))
+        for z, comps in self._map_columns(_components).items():
+            for c, v in comps.items():
+                df[z + self._components[c]] = v
+        if not in_place: return(df)
+        
+    def _transform_records(self, records):
+        comps = [(pf, _RECORD_COMPONENTS[c])
+                 for c, pf in self._components.items()]
+        for r in records:
+            for z in self._x:
+                d = r[z]
+                if _is_missing(d):
+                    for pf, f in comps:
+                        r[z + pf] = np.nan
+                    continue
+                if not hasattr(d, 'year'):
+                    d = pd.Timestamp(d)
+                for pf, f in comps:
+                    r[z + pf] = f(d)
+        return(records)
\ No newline at end of file
@@ -0,0 +1,129 @@
+import pandas as pd
+import numpy as np
+from typing import Union
+from ._base import BaseTransformer, _is_missing
+from ..utils.binners import _fit_cuts, _bin_codes
+
+class NumericBinner(BaseTransformer):
+    """
+    Bin numeric variables with the bins of cutter, fitted once and
+    reused on new data
+    
+    Parameters
+    ----------
+    x : str or list
+        Variable(s) to bin
+    
+    max_levels : int
+        maximum number of bins to create
+    
+    point_mass_threshold : float
+        Levels with frequency greater than point_mass_threshold
+        get their own bin
+    
+    sig_fig : int
+        Significant figures to use in bin labels
+    
+    out_of_range : str
+        How transform bins values outside the range of the fitted
+        cut points:
+        'clip' - into the first or last interval bin, or the
+            point mass bin of a column without interval bins
+        'category' - into an extra 'OUT OF RANGE' category
+        Missing values always stay missing.
+    
+    n_jobs : int
+        Number of threads used to fit and transform columns
+        concurrently; -1 uses all cores
+    
+    **kwargs : passed to cutpoints, e.g. cuts or qntl_cutoff
+    """
+    _state_attrs = ['_fitted', '_bins']
+    
+    _OUT_OF_RANGE = 'OUT OF RANGE'
+    
+    def __init__(self, x: Union[str,list], max_levels = 20,
+                 point_mass_threshold = 0.1, sig_fig = 3,
+                 out_of_range = 'clip', n_jobs = 1, **kwargs):
+        super(NumericBinner, self).__init__(x, n_jobs)
+        if out_of_range not in ['clip', 'category']:
+            raise ValueError("out_of_range must be one of 'clip' or 'category'")
+        self._out_of_range = out_of_range
+        self._max_levels = max_levels
+        self._point_mass_threshold = point_mass_threshold
+        self._sig_fig = sig_fig
+        self._kwargs = kwargs
+        self._bins = {}
+        
+    def _reset(self):
+        self._fitted = False
+        self._bins = {}
+        
+    def fit(self, df):
+        """
+        Fit method
+        
+        Parameters
+        ----------
+        df : pandas.DataFrame
+        """
+        if self._fitted: return
+        def _fit(z):
+            return(_fit_cuts(
+                df[z], max_levels = self._max_levels,
+                point_mass_threshold = self._point_mass_threshold,
+                sig_fig = self._sig_fig, **self._kwargs))
+        self._bins.update(self._map_columns(_fit))
+        self._fitted = True
+        
+    def _codes(self, x, z):
+        """
+        Category codes of values x of column z and the categories
+        they index, see out_of_range
+        """
+        bins = self._bins[z]
+        if self._out_of_range == 'clip':
+            return(_bin_codes(x, bins, clip = True), bins['labels'])
+        codes = _bin_codes(x, bins)
+        labels = np.append(bins['labels'], self._OUT_OF_RANGE)
+        codes[(codes == -1) & ~np.isnan(x)] = len(labels) - 1
+        return(codes, labels)
+        
+    def transform(self, df, in_place = False):
+        """
+        Transform method. Each column is binned with one searchsorted
+        pass and returned as a categorical built from integer codes.
+        Values outside the fitted range are binned as set by
+        out_of_range.
+        
+        Parameters
+        ----------
+        df : pandas.DataFrame
+        
+        in_place : Boolean
+        
+        Returns
+        -------
+        None if in_place is True
+        pandas.DataFrame if in_place is False
+        """
+        if not self._fitted:
+            raise Exception("Transformation not fit yet")
+        if not in_place:
+            df = df.copy()
+        def _bin(z):
+            codes, labels = self._codes(df[z].to_numpy(dtype = float), z)
+            return(pd.Categorical.from_codes(codes, categories = labels))
+        for z, v in self._map_columns(_bin).items():
+            df[z] = v
+        if not in_place: return(df)
+        
+    def _transform_records(self, records):
+        for z in self._x:
+            x = np.array([np.nan if _is_missing(r[z]) else r[z]
+                          for r in records], dtype = float)
+            codes, labels = self._codes(x, z)
+            labels = labels.tolist()
+            for r, code in zip(records, codes):
+                r[z] = labels[code] if code >= 0 else np.nan
+        return(records)
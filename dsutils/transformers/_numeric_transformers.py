@@ -1,38 +1,242 @@
+import math
 import numpy as np
 import pandas as pd
 from typing import Union
 
-from ._base import BaseTransformer
+from ._base import BaseTransformer, _is_missing
+from ..utils.sketches import KLLSketch
+
+def _int_bounds(bounds, dtype):
+    """
+    Float bounds as an array of integer dtype, with infinite or
+    out-of-range bounds replaced by the limits of the dtype
+    """
+    info = np.iinfo(dtype)
+    return(np.array([info.min if b < info.min else
+                     info.max if b > info.max else int(b)
+                     for b in bounds], dtype = dtype))
 
 class OutlierPercentileCapper(BaseTransformer):
+    """
+    Cap values below the lower and above the upper percentile
+    
+    Parameters
+    ----------
+    x : str or list
+        Variable(s) to cap
+    
+    lower : float or None
+        Lower quantile; if None, do not cap from below
+    
+    upper : float or None
+        Upper quantile; if None, do not cap from above
     
-    def __init__(self, x = Union[str,list], lower = 0.01, upper = 0.99):
-        super(OutlierPercentileCapper, self).__init__(x)
+    sketch_size : int
+        Accuracy parameter k of the KLLSketch per column used by
+        partial_fit and fit_iter. fit keeps a row sample of
+        10 * sketch_size rows to seed the sketches of a later
+        partial_fit.
+    
+    n_jobs : int
+        Number of threads over which the sketches of partial_fit and
+        fit_iter are updated; fit and transform work on all columns
+        at once
+    """
+    _state_attrs = ['_fitted', '_map', '_int_x']
+    _training_attrs = ['_sketches', '_samples']
+    
+    def __init__(self, x = Union[str,list], lower = 0.01, upper = 0.99,
+                 sketch_size = 1000, n_jobs = 1):
+        super(OutlierPercentileCapper, self).__init__(x, n_jobs)
         self._lower = lower
         self._upper = upper
+        self._sketch_size = sketch_size
+        self._map = {}
+        self._sketches = {}
+        self._samples = {}
+        self._int_x = []
+        
+    def _reset(self):
+        self._fitted = False
         self._map = {}
+        self._sketches = {}
+        self._samples = {}
+        self._int_x = []
+        
+    def _quantiles(self):
+        return({k: q for k, q in
+                [('lower', self._lower), ('upper', self._upper)]
+                if q is not None})
         
     def fit(self, df):
+        """
+        Fit method. All quantiles of all columns are computed in a
+        single call on the 2-D block of the columns. A bounded row
+        sample of the block is kept to seed the sketches of a later
+        partial_fit, so that its chunk is merged with the data of fit
+        rather than replacing it; the sketches are only built then.
+        
+        Parameters
+        ----------
+        df : pandas.DataFrame
+        """
         if self._fitted: return
+        self._record_int_x(df)
+        qs = self._quantiles()
+        block = df[self._x].to_numpy(dtype = float)
+        if len(qs) > 0:
+            bounds = np.nanquantile(block, list(qs.values()), axis = 0)
+        self._keep_sample(block)
+        for j, z in enumerate(self._x):
+            self._map[z] = {k: bounds[i, j] for i, k in enumerate(qs)}
+        self._fitted = True
+        
+    def partial_fit(self, df):
+        """
+        Update the bounds with a chunk of data. Quantiles are
+        estimated from a mergeable KLLSketch per column, so the
+        bounds approximate those of a fit on all chunks together.
+        
+        Parameters
+        ----------
+        df : pandas.DataFrame
+        """
+        self._update_sketches(df)
+        self._finalize()
+        
+    def fit_iter(self, dfs):
+        """
+        Fit on an iterable of DataFrames with KLLSketch quantiles,
+        e.g. the reader returned by pandas.read_csv(..., chunksize = n)
+        
+        Parameters
+        ----------
+        dfs : iterable of pandas.DataFrame
+        """
+        if self._fitted: return
+        for df in dfs:
+            self._update_sketches(df)
+        self._finalize()
+        
+    def _keep_sample(self, block):
+        # non-missing counts of the full block, which the sample stands for
+        n = np.count_nonzero(~np.isnan(block), axis = 0)
+        m = 10 * self._sketch_size
+        if len(block) > m:
+            rng = np.random.default_rng(0)
+            block = block[np.sort(rng.choice(len(block), m, replace = False))]
+        self._samples = {z: (int(n[j]), block[:, j].copy())
+                         for j, z in enumerate(self._x)}
+        
+    def _record_int_x(self, df):
+        # integer columns, whose records are capped to integer bounds
+        self._int_x = [z for z in self._x
+                       if pd.api.types.is_integer_dtype(df[z].dtype)]
+        
+    def _update_sketches(self, df):
+        self._check_training_state()
+        self._record_int_x(df)
+        for z in self._x:
+            if z not in self._sketches:
+                self._sketches[z] = KLLSketch(
+                    self._sketch_size, random_state = 0)
+                if z in self._samples:
+                    # seed with the row sample kept by fit
+                    n, sample = self._samples.pop(z)
+                    self._sketches[z].update_sample(sample, n)
+        self._map_columns(
+            lambda z: self._sketches[z].update(df[z].to_numpy(dtype = float)))
+            
+    def _finalize(self):
+        qs = self._quantiles()
         for z in self._x:
-            self._map[z] = {}
-            if self._lower is not None:
-                self._map[z]['lower'] = df[z].quantile(
-                    self._lower)
-            if self._upper is not None:
-                self._map[z]['upper'] = df[z].quantile(
-                    self._upper)
+            bounds = self._sketches[z].quantile(list(qs.values()))
+            self._map[z] = dict(zip(qs, bounds))
         self._fitted = True
         
     def transform(self, df, in_place = False):
+        """
+        Transform method. Columns sharing a numpy dtype are clipped
+        with one np.clip call over their 2-D block rather than with
+        boolean masks, so every column keeps its dtype. Integer
+        columns are clipped to the integers within the bounds. Columns
+        of other dtypes are clipped one by one with pandas.Series.clip.
+        
+        The clipped block is the only copy made of the capped columns:
+        its rows back the new columns, which replace those of df if
+        in_place is True. If in_place is False, only the other columns
+        are copied into the output.
+        
+        Parameters
+        ----------
+        df : pandas.DataFrame
+        
+        in_place : Boolean
+        
+        Returns
+        -------
+        None if in_place is True
+        pandas.DataFrame if in_place is False
+        """
         if not self._fitted:
             raise Exception("Transformation not fit yet")
-        if not in_place:
-            df = df.copy()
+        groups = {}
+        for z in self._x:
+            groups.setdefault(df[z].dtype, []).append(z)
+        clipped = {}
+        for dtype, cols in groups.items():
+            lower, upper = np.array([self._bounds(z) for z in cols]).T
+            if isinstance(dtype, np.dtype) and dtype.kind == 'f':
+                lower, upper = lower.astype(dtype), upper.astype(dtype)
+            elif isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+                lower = _int_bounds(np.ceil(lower), dtype)
+                upper = _int_bounds(np.floor(upper), dtype)
+            else:
+                if pd.api.types.is_integer_dtype(dtype):
+                    lower, upper = np.ceil(lower), np.floor(upper)
+                for z, l, u in zip(cols, lower, upper):
+                    clipped[z] = df[z].clip(
+                        l.item() if np.isfinite(l) else None,
+                        u.item() if np.isfinite(u) else None)
+                continue
+            # one row per column, so that every column is contiguous
+            block = np.clip(df[cols].to_numpy(dtype = dtype).T,
+                            lower[:, None], upper[:, None])
+            for z, v in zip(cols, block):
+                clipped[z] = pd.Series(v, index = df.index, copy = False)
+        if in_place:
+            for z, v in clipped.items():
+                df[z] = v
+            return
+        out = df.drop(columns = list(clipped))
+        for i, z in enumerate(df.columns):
+            if z in clipped:
+                out.insert(i, z, clipped[z])
+        return(out)
+        
+    def _bounds(self, z):
+        """
+        Lower and upper bound of column z, -inf and inf if missing or
+        not finite (e.g. the column was all missing at fit)
+        """
+        bounds = [float(self._map[z].get(k, np.nan)) for k in ['lower', 'upper']]
+        return([b if np.isfinite(b) else s*np.inf
+                for b, s in zip(bounds, [-1, 1])])
+        
+    def _transform_records(self, records):
         for z in self._x:
-            vals = self._map[z]
-            if 'lower' in vals.keys():
-                df.loc[df[z] < vals['lower'],z] = vals['lower']
-            if 'upper' in vals.keys():
-                df.loc[df[z] > vals['upper'],z] = vals['upper']
-        if not in_place: return(df)
\ No newline at end of file
+            lower, upper = self._bounds(z)
+            if z in self._int_x:
+                # columns fitted as integers are capped to the integers
+                # within the bounds, as transform does
+                lower = math.ceil(lower) if np.isfinite(lower) else lower
+                upper = math.floor(upper) if np.isfinite(upper) else upper
+            for r in records:
+                v = r[z]
+                if _is_missing(v) or isinstance(v, bool):
+                    continue
+                if v < lower:
+                    r[z] = lower
+                elif v > upper:
+                    r[z] = upper
+        return(records)
\ No newline at end of file
@@ -5,7 +5,7 @@ import os
 from decimal import Decimal
 from .dates import bin_dates
 import copy
-import re
+import functools
 
 def cutpoints(
     x,
@@ -106,6 +106,88 @@ def cutpoints(
     return(c_final)
 
 
+def cutpoints_matrix(
+    X,
+    qntl_cutoff = [0.025,0.975],
+    cuts = 'linear',
+    ncuts = 10,
+    sig_fig = 3,
+    **kwargs):
+    '''
+    Vectorized cutpoints for every column of a 2-D array. Bounds,
+    quantile cutoffs, cut points and significant-figure rounding are
+    computed for all columns at once; only the final de-duplication
+    is done per column.
+    
+    Parameters
+    ----------
+    X : numpy 2-D array
+        numeric array with one variable per column; NaNs are ignored
+    
+    qntl_cutoff, cuts, ncuts, sig_fig :
+        see cutpoints. If cuts is an array of cut points, it is used
+        for every column.
+        
+    Returns
+    -------
+    list of numpy 1-D arrays : final cut points for each column of X
+    '''
+    X = np.asarray(X, dtype = float)
+    if X.ndim == 1:
+        X = X[:,None]
+    quantile = np.nanquantile if np.isnan(X).any() else np.quantile
+    
+    # Create lower and upper bounds:
+    lb = np.nanmin(X, axis = 0)
+    lb_pwr = 10.0**(sig_fig - 1 - _order_of_mag_array(lb))
+    lb = np.floor(lb * lb_pwr) / lb_pwr
+    ub = np.nanmax(X, axis = 0)
+    ub_pwr = 10.0**(sig_fig - 1 - _order_of_mag_array(ub))
+    ub = np.ceil(ub * ub_pwr) / ub_pwr
+    
+    # Apply quantile cutoffs if provided:
+    if (qntl_cutoff is not None and
+            len(qntl_cutoff) == 2 and
+            isinstance(qntl_cutoff[0],float) and
+            isinstance(qntl_cutoff[1],float)):
+        ep = quantile(X, qntl_cutoff, axis = 0)
+    else:
+        ep = np.vstack([lb,ub])
+    
+    # Create cut points, one column per variable
+    if isinstance(cuts,str):
+        if cuts == 'linear':
+            c = np.linspace(ep[0],ep[1],num = ncuts)
+        elif cuts == 'log':
+            if np.any(ep[0] <= 0):
+                msg = "Variable range includes zero when using 'log'" + \
+                      " - consider using 'logp1' instead"
+                raise ValueError(msg)
+            c = 10**np.linspace(
+                np.sign(ep[0])*np.log(np.abs(ep[0]))/np.log(10),
+                np.sign(ep[1])*np.log(np.abs(ep[1]))/np.log(10),
+                num = ncuts
+                )
+        elif cuts == 'logp1':
+            c = 10**np.linspace(
+                np.sign(ep[0])*np.log(np.abs(ep[0]) + 1)/np.log(10),
+                np.sign(ep[1])*np.log(np.abs(ep[1]) + 1)/np.log(10),
+                num = ncuts
+                )
+            c = np.vstack([np.zeros(X.shape[1]),c])
+        elif cuts == 'quantile':
+            c = quantile(X,np.linspace(0,1,ncuts),axis = 0)
+    else:
+        # cuts are the actual cut points themselves
+        c = np.tile(np.asarray(cuts, dtype = float)[:,None], (1,X.shape[1]))
+    
+    # add far endpoints and round/format all values at once:
+    c = np.vstack([lb,c,ub])
+    c_mag = 10.0**_order_of_mag_array(c)
+    c = np.round(c / c_mag, sig_fig - 1) * c_mag
+    return([np.unique(c[:,j]) for j in range(X.shape[1])])
+
+
 def human_readable_num(number, sig_fig = 3, **kwargs):
     '''
     Function for making numbers aesthetically-pleasing
@@ -163,6 +245,43 @@ def human_readable_num(number, sig_fig = 3, **kwargs):
     return(z)
 
 
+@functools.lru_cache(maxsize = 65536)
+def _human_readable_num_cached(number, sig_fig):
+    return(human_readable_num(number, sig_fig = sig_fig))
+
+
+def human_readable_nums(x, sig_fig = 3, **kwargs):
+    '''
+    Format an array of numbers like human_readable_num. Each distinct
+    value is formatted once, and formatted values are cached across
+    calls.
+    
+    Parameters
+    ----------
+    x : 1-D array-like of numbers
+        Numbers to format
+    
+    sig_fig : int
+        Number of significant figures to print
+    
+    Returns
+    -------
+    z : numpy 1-D object array of str
+        numbers formatted as str
+    '''
+    x = np.asarray(x)
+    if x.dtype == object:
+        x = x.astype(float)
+    z = np.full(len(x), 'MISSING', dtype = object)
+    not_nan = ~np.isnan(x) if x.dtype.kind in 'fc' else slice(None)
+    vals, inv = np.unique(x[not_nan], return_inverse = True)
+    formatted = np.array(
+        [_human_readable_num_cached(v, sig_fig) for v in vals.tolist()],
+        dtype = object)
+    z[not_nan] = formatted[inv.ravel()]
+    return(z)
+
+
 def cutter(
     df, x, max_levels = 20, point_mass_threshold = 0.1,
     sig_fig = 3, **kwargs):
@@ -193,61 +312,126 @@ def cutter(
         Categorical series of binned values
     """
     
-    df = df.loc[:,[x]].copy()
+    # point masses are found with a single value_counts in _fit_cuts;
+    # intervals and point masses are then coded in one searchsorted
+    # pass each, and the Categorical is built from the codes directly
+    bins = _fit_cuts(
+        df[x],
+        max_levels = max_levels,
+        point_mass_threshold = point_mass_threshold,
+        sig_fig = sig_fig,
+        **kwargs)
+    codes = _bin_codes(df[x].to_numpy(dtype = float), bins)
+    z = pd.Categorical.from_codes(codes, categories = bins['labels'])
+    return(z)
+
+
+def _fit_cuts(
+    x, max_levels = 20, point_mass_threshold = 0.1,
+    sig_fig = 3, **kwargs):
+    """
+    Fit the bins used by cutter: point masses, final cut points and
+    labels, plus the category code of every bin
     
-    # pm contains any values that exceed point_mass_threshold
-    # pm is 1-D numpy.array
-    pm = _point_mass(df[x], threshold = point_mass_threshold)
+    Parameters
+    ----------
+    x : pandas.Series
+        numeric variable to construct bins from
     
-    if len(pm) == 0:
-        # if there are no values exceeding point_mass_threshold
-        # proceed as usual
-        x_no_nan = ~np.isnan(df.loc[:,x].values)
-        cps = cutpoints(
-            df.loc[x_no_nan,x].values,
-            ncuts = max_levels,
-            **kwargs)
-        
-    elif len(pm) > 0:
-        # if there are values exceeding point_mass_threshold
-        # put all remaining values in rem
-        rem = df.loc[~df[x].isin(pm),[x]]
-        x_no_nan = ~np.isnan(rem.loc[:,x].values)
-        if len(rem.loc[x_no_nan,x].values) > 0:
-            # apply cutpoints to rem if there are non-NaN
-            # values
-            cps = cutpoints(
-                rem.loc[x_no_nan,x].values,
-                ncuts = max_levels, # - len(pm),
-                **kwargs)
-        else:
-            # Otherwise, rem has no non-NaN values and
-            # we just generate empty cutpoints
-            cps = np.array([])
-
-    # Construct bin_labels and pm_labels
+    max_levels, point_mass_threshold, sig_fig :
+        see cutter
+    
+    Returns
+    -------
+    dict with
+        'cuts' : numpy 1-D array of final cut points
+        'pm' : numpy 1-D array of point masses
+        'labels' : numpy 1-D array of sorted category labels
+        'bin_codes' : category code of each interval bin
+        'pm_codes' : category code of each point mass
+    """
+    pm = _point_mass(x, threshold = point_mass_threshold)
+    v = x.to_numpy(dtype = float)
+    rem = v[~np.isnan(v) & ~np.isin(v, pm)]
+    if len(pm) == 0 or len(rem) > 0:
+        cps = cutpoints(rem, ncuts = max_levels, **kwargs)
+    else:
+        cps = np.array([])
     c_final, bin_labels, pm_labels = _finalize_bins(cps,pm,sig_fig=sig_fig)
+    labels = np.array(sorted(bin_labels + pm_labels), dtype = str)
+    return({
+        'cuts': c_final,
+        'pm': pm.astype(float),
+        'labels': labels,
+        'bin_codes': np.searchsorted(labels, bin_labels),
+        'pm_codes': np.searchsorted(labels, pm_labels)
+    })
+
+
+def _value_codes(x, bins, clip = False):
+    """
+    Category codes of values x, see _bin_codes, computed with masks
+    over x; used by _bin_codes on the few edges of the bins only
+    """
+    c, pm = bins['cuts'], bins['pm']
+    codes = np.full(len(x), -1, dtype = np.int64)
+    if len(c) > 1:
+        b = np.searchsorted(c, x, side = 'left') - 1
+        b[x == c[0]] = 0
+        if clip:
+            b[x < c[0]] = 0
+            b[x > c[-1]] = len(c) - 2
+        in_bin = (b >= 0) & (b < len(c) - 1)
+        codes[in_bin] = bins['bin_codes'][b[in_bin]]
+    if len(pm) > 0:
+        j = np.minimum(np.searchsorted(pm, x), len(pm) - 1)
+        is_pm = pm[j] == x
+        codes[is_pm] = bins['pm_codes'][j[is_pm]]
+        if clip and len(c) <= 1:
+            # cuts include every point mass, so without interval bins
+            # there is a single one, which takes all clipped values
+            codes[(codes == -1) & ~np.isnan(x)] = bins['pm_codes'][0]
+    return(codes)
+
+
+def _bin_codes(x, bins, clip = False):
+    """
+    Assign category codes with the bins fitted by _fit_cuts. Values
+    fall in right-closed intervals of bins['cuts'] (the first interval
+    also includes its lower end), point masses get their own codes, and
+    NaNs get -1. Values outside the cut points get -1 too, unless clip
+    is True, in which case they are binned in the first or last
+    interval (never as a point mass they are not equal to), or in the
+    single point mass if there are no intervals.
+    
+    The edges of all bins, with the float just below the lowest cut
+    and below every point mass so that these values get slots of
+    their own, split the line into slots of constant code. A single
+    searchsorted pass finds the slot of every value, and the code of
+    each slot is looked up into the searchsorted output, so the only
+    full-length array is the int64 code array.
     
-    # Bin values
-    df.loc[~df[x].isin(pm),x + '_BINNED'] = pd.cut(
-        df.loc[~df[x].isin(pm),x].values,
-        c_final,
-        labels=bin_labels,
-        include_lowest=True)
+    Parameters
+    ----------
+    x : numpy 1-D float array
     
-    # Bring in point masses
-    for i,v in enumerate(pm):
-        df.loc[df[x] == v,x + '_BINNED'] = pm_labels[i]
+    bins : dict returned by _fit_cuts
     
-    # Construct final labels
-    final_labels = bin_labels+pm_labels
-    final_labels.sort()
-        
-    # Apply labels
-    z = pd.Categorical(
-        df.loc[:,x + '_BINNED'].values,
-        categories = final_labels)
-    return(z)
+    clip : boolean
+    
+    Returns
+    -------
+    numpy 1-D int array of category codes
+    """
+    c, pm = bins['cuts'], bins['pm']
+    edges = np.unique(np.concatenate([
+        c[:1], np.nextafter(c[:1], -np.inf), c[1:],
+        pm, np.nextafter(pm, -np.inf), [np.inf]]))
+    # slot i holds the values in (edges[i-1], edges[i]], and the
+    # extra last slot the NaNs
+    lookup = np.append(_value_codes(edges, bins, clip), -1)
+    codes = np.searchsorted(edges, x, side = 'left')
+    return(np.take(lookup, codes, out = codes, mode = 'clip'))
 
 
 def binner_df(df, x, new_col, fill_nan = None, max_levels = 20, **kwargs):
@@ -321,6 +505,26 @@ def _order_of_mag(x):
         ord_of_mag = int(np.floor(_log_spcl(x)))
     return(ord_of_mag)
 
+def _order_of_mag_array(x):
+    """
+    Vectorized _order_of_mag
+    
+    Parameters
+    ----------
+    
+    x : numpy array
+    
+    Returns
+    -------
+    
+    numpy int array : order of magnitude of each element, 0 for zeros
+    """
+    a = np.abs(np.asarray(x, dtype = float))
+    ord_of_mag = np.zeros(a.shape, dtype = int)
+    nz = (a != 0) & np.isfinite(a)
+    ord_of_mag[nz] = np.floor(np.log(a[nz]) / math.log(10))
+    return(ord_of_mag)
+
 def _point_mass(x, threshold = 0.1):
     """
     Find point masses in 1-D array with frequency exceeding
@@ -341,8 +545,7 @@ def _point_mass(x, threshold = 0.1):
     1-D numpy array that contains the point masses
     """
     cnts = x.value_counts(normalize=True)
-    v = cnts[cnts > threshold].index.values
-    v.sort()
+    v = np.sort(cnts[cnts > threshold].index.values)
     return(v)
 
 
@@ -361,9 +564,8 @@ def _remove_trailing_zeros(num_as_str):
     
     Number as str with unnecessary trailing zeros removed
     """
-    if re.search("\.",num_as_str):
-        num_as_str = re.sub("0*$","",num_as_str)
-        num_as_str = re.sub("\.$","",num_as_str)
+    if '.' in num_as_str:
+        num_as_str = num_as_str.rstrip('0').rstrip('.')
     return(num_as_str)
 
 def _remove_closest(x, y, exclude_endpoints = True, **kwargs):
@@ -387,18 +589,29 @@ def _remove_closest(x, y, exclude_endpoints = True, **kwargs):
         to the elements of y
     """
     x = x.copy()
-    if len(x) > 2 or not exclude_endpoints:
+    if (len(x) > 2 or not exclude_endpoints) and len(x) > 0 and len(y) > 0:
         if exclude_endpoints:
             z = x[1:-1]
         else:
             z = x
-        r = range(len(z))
-        ridx = [min(r, key = lambda i: abs(z[i] - j)) + 1 for j in y]
-        ridx = list(set(ridx))
-        x = x.tolist()
-        for index in sorted(ridx, reverse=True):
-            del x[index]
-        x = np.array(x)
+        # nearest element of z to every element of y, found with
+        # searchsorted on sorted z; ties go to the lower index of z
+        order = np.argsort(z, kind = 'stable')
+        zs = z[order]
+        y = np.asarray(y, dtype = float)
+        pos = np.searchsorted(zs, y)
+        lo = np.maximum(pos - 1, 0)
+        hi = np.minimum(pos, len(zs) - 1)
+        # first occurrence of each neighbour value has the lowest index
+        lo = np.searchsorted(zs, zs[lo])
+        hi = np.searchsorted(zs, zs[hi])
+        d_lo = np.abs(zs[lo] - y)
+        d_hi = np.abs(zs[hi] - y)
+        nearest = np.where(
+            (d_lo < d_hi) | ((d_lo == d_hi) & (order[lo] < order[hi])),
+            order[lo], order[hi])
+        nearest[np.isnan(y)] = 0
+        x = np.delete(x, np.unique(nearest) + 1)
     return(x)
 
 def _finalize_bins(x, pm, sig_fig = 3, **kwargs):
@@ -462,20 +675,21 @@ def _label_constructor(x, pm, sig_fig = 3, **kwargs):
     """
     bin_labels = []
     pm_labels = []
-    x_format = [human_readable_num(i, sig_fig = sig_fig) for i in x]
+    x_format = human_readable_nums(x, sig_fig = sig_fig)
+    is_pm = np.isin(x, pm)
     cntr = 0
     for i in range(len(x)):
-        if x[i] in pm:
+        if is_pm[i]:
             pm_labels.append(str(i+cntr+1).zfill(2) + ": " + x_format[i])
             cntr+=1
         if i < len(x) - 1:
             bin_labels.append(
                 str(i + cntr +1).zfill(2) +
                 ': ' +
-                ('[' if i==0 and (x[i] not in pm) else '(') +
+                ('[' if i==0 and not is_pm[i] else '(') +
                 x_format[i] +
                 ', ' +
                 x_format[i+1] +
-                (']' if (x[i+1] not in pm) else ')')
+                (']' if not is_pm[i+1] else ')')
             )
     return(bin_labels, pm_labels)
\ No newline at end of file
@@ -7,8 +7,10 @@ from decimal import Decimal
 from .dates import bin_dates
 from .binners import (
     cutpoints,
-    human_readable_num,
-    cutter
+    human_readable_nums,
+    cutter,
+    _fit_cuts,
+    _bin_codes
 )
 
 
@@ -149,10 +151,10 @@ def _numeric_histogram(
     if binner:
         p = (
             df[[*oth_columns,x]].copy()
-            .assign(**{x: lambda z: cutter(z,x,max_levels,**kwargs)})
-            .replace({x:{np.nan:'MISSING'}})
+            .assign(**{x: lambda z: _fill_missing(
+                cutter(z,x,max_levels,**kwargs))})
             .assign(_COUNT_ = 1)
-            .groupby(x)
+            .groupby(x,observed=True)
             .agg(stats)
             .reset_index()
             #.rename(columns = {x_grp:x})
@@ -165,14 +167,37 @@ def _numeric_histogram(
             .agg(stats)
             .reset_index()
             )
-        vals = p[x].unique().tolist()
-        vals_format = [str(i+1).zfill(2) +
-                       ": " + human_readable_num(j)
-                       for i,j in enumerate(vals)]
-        p.loc[:,x] = p[x].map(dict(zip(vals, vals_format)))
+        # one row per distinct value of x after groupby
+        p[x] = [str(i+1).zfill(2) + ": " + j
+                for i,j in enumerate(human_readable_nums(p[x].to_numpy()))]
 
     return(p)
 
+def _fill_missing(bins):
+    '''
+    Categorical bins with missing values replaced by a 'MISSING'
+    category, added only if some value is missing
+    '''
+    if bins.isna().any():
+        bins = bins.add_categories('MISSING').fillna('MISSING')
+    return(bins)
+
+def _group_levels(labels, oth_val):
+    '''
+    Sorted object Index of the unique values of labels, a numpy
+    object array of sorted levels some of which were replaced by
+    oth_val. Levels not comparable with oth_val (e.g. integers) keep
+    their order and oth_val goes last.
+    '''
+    grp_levels = pd.Index(labels, dtype = object).unique()
+    try:
+        return(grp_levels.sort_values())
+    except TypeError:
+        if oth_val in grp_levels:
+            grp_levels = grp_levels[grp_levels != oth_val].append(
+                pd.Index([oth_val], dtype = object))
+        return(grp_levels)
+
 def _categorical_histogram(
     df,
     x = 'x',
@@ -197,7 +222,8 @@ def _categorical_histogram(
         
     max_levels : maximum number of bins to create from 'x' - the max_level
         values of 'x' with the greatest record counts receive their own levels,
-        all other levels are binned as 'oth_val'
+        all other levels are binned as 'oth_val'. Levels tied at the cutoff
+        are kept in sorted order of the levels, e.g. 'a' before 'b'.
         
     oth_val : str used as value for levels with fewer record counts
     
@@ -214,38 +240,28 @@ def _categorical_histogram(
     elif isinstance(oth_columns,str):
         oth_columns = [oth_columns]
     
-    x_grp = '_' + x + ' _GROUPED_'
-    
-    def _max_lvl_cutoff(f):
-        y = f[x] if f.RN <= max_levels else oth_val
-        return(y)
-    
-    k = {x_grp: lambda z: z.apply(_max_lvl_cutoff, axis = 1)}
-    #k = {x: lambda z: z.apply(_max_lvl_cutoff, axis = 1)}
-    cnts = (
-        df.groupby(x)
-          .size()
-          .to_frame(name='_COUNT_')
-          .reset_index()
-          .sort_values('_COUNT_',ascending = False)
-          .assign(RN = lambda x: x['_COUNT_'].rank(method = 'first',ascending = False))
-          .assign(**k)
-        )
-    m = dict(zip(cnts[x],cnts[x_grp]))
+    # integer codes of the levels of x, sorted; missing values are -1
+    codes, levels = pd.factorize(df[x], sort = True)
+    cnts = np.bincount(codes[codes >= 0], minlength = len(levels))
+    # keep the max_levels most frequent levels, others become oth_val
+    keep = np.zeros(len(levels), dtype = bool)
+    keep[np.argsort(-cnts, kind = 'stable')[:max_levels]] = True
+    labels = np.where(keep, levels.to_numpy(dtype = object), oth_val)
+    grp_levels = _group_levels(labels, oth_val)
+    grp_codes = np.where(
+        codes >= 0, grp_levels.get_indexer(labels)[codes], -1)
+    
+    p = pd.DataFrame(index = grp_levels.rename(x))
     if len(oth_columns) > 0:
-        stats = dict(zip(oth_columns,[stat]*len(oth_columns)))
-    else:
-        stats = dict()
-    stats['_COUNT_'] = 'sum'
-    p = (
-        df.assign(**{x_grp: lambda f: f[x].map(m)})
-          .assign(_COUNT_ = 1)
-          .groupby(x_grp)
-          .agg(stats)
-          .reset_index()
-          .rename(columns = {x_grp:x})
-    )
-    return(p)
+        p[oth_columns] = (
+            df[oth_columns].groupby(grp_codes)
+              .agg(stat)
+              .reindex(range(len(grp_levels)))
+              .to_numpy()
+        )
+    p['_COUNT_'] = np.bincount(
+        grp_codes[grp_codes >= 0], minlength = len(grp_levels))
+    return(p.reset_index())
 
 def numeric_histogram(
     df,
@@ -363,6 +379,155 @@ def categorical_histogram(
     return(p)
     
     
+class HistogramAccumulator:
+    """
+    Accumulate a histogram of 'x', and statistics of 'line_columns'
+    within its bins, over chunks of data, e.g. the reader returned by
+    pandas.read_csv(..., chunksize = n). Only per-bin counts, sums,
+    non-missing counts, minimums and maximums are kept in memory.
+    
+    Parameters
+    ----------
+    x : str
+        the variable to histogram
+    
+    line_columns : optional list of other columns on which to
+        calculate 'stat' within bins of 'x'
+    
+    kind : str
+        'numeric' - bin 'x' like numeric_histogram. Unless 'bins' is
+            given, bins are fitted on the first chunk; later values
+            outside these bins are counted as 'OUT OF RANGE'
+        'categorical' - count levels of 'x' like categorical_histogram
+    
+    max_levels : int
+        maximum number of bins or levels
+    
+    oth_val : str
+        level for categorical levels outside the max_levels most
+        frequent ones
+    
+    stat : str
+        one of 'mean', 'sum', 'min', 'max' or 'count'
+    
+    bins : dict
+        bins from binners._fit_cuts, e.g. NumericBinner._bins[x]
+    
+    **kwargs : passed to cutpoints when fitting bins
+    """
+    _STATS = ['mean', 'sum', 'min', 'max', 'count']
+    
+    def __init__(self, x, line_columns = None, kind = 'numeric',
+                 max_levels = 20, oth_val = '_OTHER_', stat = 'mean',
+                 bins = None, **kwargs):
+        if kind not in ['numeric', 'categorical']:
+            raise ValueError("kind must be one of 'numeric' or 'categorical'")
+        if stat not in self._STATS:
+            raise ValueError("stat must be one of " + ", ".join(self._STATS))
+        if line_columns is None:
+            line_columns = []
+        elif isinstance(line_columns, str):
+            line_columns = [line_columns]
+        self.x = x
+        self.line_columns = line_columns
+        self.kind = kind
+        self.max_levels = max_levels
+        self.oth_val = oth_val
+        self.stat = stat
+        self.bins = bins
+        self._kwargs = kwargs
+        self._acc = None
+        
+    def _aggs(self):
+        # how partial results of each statistic are merged
+        aggs = {'_COUNT_': 'sum'}
+        for col in self.line_columns:
+            for f, merge in [('sum','sum'), ('count','sum'),
+                             ('min','min'), ('max','max')]:
+                aggs[col + '|' + f] = merge
+        return(aggs)
+        
+    def update(self, df):
+        """
+        Add a chunk of data
+        
+        Parameters
+        ----------
+        df : pandas.DataFrame
+        """
+        if self.kind == 'numeric':
+            if self.bins is None:
+                self.bins = _fit_cuts(
+                    df[self.x], max_levels = self.max_levels, **self._kwargs)
+            v = df[self.x].to_numpy(dtype = float)
+            codes = _bin_codes(v, self.bins)
+            labels = np.append(self.bins['labels'],
+                               ['MISSING', 'OUT OF RANGE'])
+            codes[codes == -1] = np.where(
+                np.isnan(v[codes == -1]), len(labels) - 2, len(labels) - 1)
+            key = labels[codes]
+        else:
+            key = df[self.x].to_numpy()
+        g = df[self.line_columns].groupby(key)
+        if len(self.line_columns) > 0:
+            part = g.agg(['sum', 'count', 'min', 'max'])
+            part.columns = [c + '|' + f for c, f in part.columns]
+            part['_COUNT_'] = g.size()
+        else:
+            part = g.size().to_frame('_COUNT_')
+        if self._acc is not None:
+            part = pd.concat([self._acc, part]) \
+                     .groupby(level = 0).agg(self._aggs())
+        self._acc = part
+        return(self)
+        
+    def table(self):
+        """
+        Return the accumulated histogram in the format of
+        _numeric_histogram / _categorical_histogram
+        
+        Returns
+        -------
+        p : pandas DataFrame object
+        """
+        if self._acc is None:
+            raise Exception("No data accumulated yet")
+        acc = self._acc
+        if self.kind == 'categorical':
+            # object labels, so that numeric levels are not cast to
+            # strings alongside oth_val, in _categorical_histogram order
+            labels = acc.index.to_numpy(dtype = object)
+            if acc.shape[0] > self.max_levels:
+                top = acc['_COUNT_'].sort_values(
+                    ascending = False, kind = 'stable').index[:self.max_levels]
+                labels = np.where(acc.index.isin(top), labels, self.oth_val)
+            grp_levels = _group_levels(labels, self.oth_val)
+            acc = acc.groupby(grp_levels.get_indexer(labels)).agg(self._aggs())
+            acc.index = grp_levels
+        p = pd.DataFrame(index = acc.index)
+        for col in self.line_columns:
+            if self.stat == 'mean':
+                p[col] = acc[col + '|sum'] / acc[col + '|count']
+            else:
+                p[col] = acc[col + '|' + self.stat]
+        p['_COUNT_'] = acc['_COUNT_']
+        return(p.rename_axis(self.x).reset_index())
+    
+    def plot(self, normalize = False, **kwargs):
+        """
+        Plot the accumulated histogram with plot_bar
+        
+        Returns
+        -------
+        fig : a matplotlib figure
+        """
+        return(plot_bar(self.table(),
+                        x = self.x,
+                        line_columns = self.line_columns,
+                        normalize = normalize,
+                        **kwargs))
+
+    
 def categorical_heatmap(
     df,
     x,
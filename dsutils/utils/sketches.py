@@ -0,0 +1,167 @@
+"""
+Bounded-memory summaries for fitting on large or streaming data
+"""
+
+import numpy as np
+
+def misra_gries_reduce(cnts, k):
+    """
+    Reduce level counts to a Misra-Gries summary with at most k
+    counters. Summaries are mergeable: adding two summaries (or a
+    summary and exact counts of a new chunk) and reducing again keeps
+    the same guarantee.
+    
+    Error bounds: if n records have been counted in total, every
+    estimated count f_hat of a level with true count f satisfies
+    f - n / (k + 1) <= f_hat <= f. Levels that are not in the summary
+    have true count at most n / (k + 1).
+    
+    See: Agarwal et al., "Mergeable Summaries", PODS 2012
+    
+    Parameters
+    ----------
+    cnts : pandas.Series
+        counts (or estimated counts) indexed by level
+    
+    k : int
+        maximum number of counters to keep
+        
+    Returns
+    -------
+    pandas.Series with at most k positive counts
+    """
+    if len(cnts) <= k:
+        return(cnts)
+    kth = np.partition(cnts.values, -(k + 1))[-(k + 1)]
+    cnts = cnts - kth
+    return(cnts[cnts > 0])
+
+
+class KLLSketch:
+    """
+    Mergeable quantile sketch in the style of Karnin, Lang and
+    Liberty, "Optimal Quantile Approximation in Streams", FOCS 2016.
+    
+    Values are kept in a hierarchy of compactors; an item at level h
+    stands for 2**h original values. When a compactor exceeds its
+    capacity it is sorted and every other item is promoted to the
+    next level. Memory is O(k) items and the rank error of a
+    quantile estimate is roughly O(1 / k) of the number of values
+    seen (typically below 1% for k = 200 and 0.2% for k = 1000).
+    
+    Parameters
+    ----------
+    k : int
+        Capacity of the top compactor; controls accuracy and memory
+    
+    random_state : int or None
+        Seed for the random compaction offsets
+    """
+    def __init__(self, k = 200, random_state = None):
+        self._k = k
+        self._rng = np.random.default_rng(random_state)
+        self._levels = [np.empty(0)]
+        self.n = 0
+        
+    def update(self, values):
+        """
+        Add values to the sketch. NaNs are ignored.
+        
+        Parameters
+        ----------
+        values : 1-D array-like of numbers
+        """
+        v = np.asarray(values, dtype = float)
+        v = v[~np.isnan(v)]
+        self.n += len(v)
+        self._levels[0] = np.concatenate([self._levels[0], v])
+        self._compress()
+        return(self)
+        
+    def update_sample(self, values, n):
+        """
+        Add a uniform random sample of values that stands for n
+        values, e.g. a row sample kept from an exact fit. The sample
+        enters at the level whose weight is closest to n / len(sample).
+        NaNs are ignored.
+        
+        Parameters
+        ----------
+        values : 1-D array-like of numbers
+        
+        n : int
+            Number of values the sample represents
+        """
+        v = np.asarray(values, dtype = float)
+        v = v[~np.isnan(v)]
+        if len(v) == 0: return(self)
+        h = max(0, int(np.round(np.log2(n / len(v)))))
+        while len(self._levels) <= h:
+            self._levels.append(np.empty(0))
+        self._levels[h] = np.concatenate([self._levels[h], v])
+        self.n += n
+        self._compress()
+        return(self)
+        
+    def merge(self, other):
+        """
+        Merge another KLLSketch into this one
+        
+        Parameters
+        ----------
+        other : KLLSketch
+        """
+        for h, items in enumerate(other._levels):
+            if h == len(self._levels):
+                self._levels.append(np.empty(0))
+            self._levels[h] = np.concatenate([self._levels[h], items])
+        self.n += other.n
+        self._compress()
+        return(self)
+        
+    def _capacity(self, h):
+        depth = len(self._levels) - 1 - h
+        return(max(2, int(np.ceil(self._k * (2/3)**depth))))
+    
+    def _compress(self):
+        h = 0
+        while h < len(self._levels):
+            if len(self._levels[h]) > self._capacity(h):
+                if h + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                buf = np.sort(self._levels[h])
+                # an odd item out stays at this level
+                keep, buf = buf[:len(buf) % 2], buf[len(buf) % 2:]
+                offset = self._rng.integers(2)
+                self._levels[h + 1] = np.concatenate(
+                    [self._levels[h + 1], buf[offset::2]])
+                self._levels[h] = keep
+                # capacities depend on the number of levels
+                h = 0
+            else:
+                h += 1
+                
+    def quantile(self, q):
+        """
+        Estimate quantiles of the values seen
+        
+        Parameters
+        ----------
+        q : float or 1-D array-like of floats in [0, 1]
+        
+        Returns
+        -------
+        float or numpy 1-D array, NaN if the sketch is empty
+        """
+        q_arr = np.atleast_1d(np.asarray(q, dtype = float))
+        items = np.concatenate(self._levels)
+        if len(items) == 0:
+            res = np.full(len(q_arr), np.nan)
+        else:
+            weights = np.concatenate(
+                [np.full(len(l), 2.0**h) for h, l in enumerate(self._levels)])
+            order = np.argsort(items, kind = 'stable')
+            items, cum = items[order], np.cumsum(weights[order])
+            idx = np.searchsorted(cum, q_arr * cum[-1], side = 'left')
+            res = items[np.minimum(idx, len(items) - 1)]
+        return(res if np.ndim(q) else res[0])
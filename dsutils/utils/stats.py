@@ -1,9 +1,37 @@
-import scipy.stats as ss
 import numpy as np
-from itertools import combinations_with_replacement
+from itertools import combinations, combinations_with_replacement
+import os
+import heapq
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 from scipy.sparse.csgraph import reverse_cuthill_mckee
-from scipy.sparse import csr_matrix
+from scipy.sparse import csr_matrix, coo_matrix, issparse
+
+def _chi2_stat(confusion_matrix):
+    """
+    Pearson's chi-squared statistic of a contingency table without
+    empty rows or columns, with Yates' continuity correction when the
+    table has one degree of freedom, as in scipy.stats.chi2_contingency
+    
+    Parameters
+    --------------------------
+    confusion_matrix : numpy 2-D array of counts
+        
+    Returns
+    ---------------------------
+    float : chi-squared statistic
+    """
+    observed = np.asarray(confusion_matrix, dtype = float)
+    r,k = observed.shape
+    if (r-1)*(k-1) == 0:
+        return(0.0)
+    expected = np.outer(observed.sum(axis = 1), observed.sum(axis = 0)) \
+        / observed.sum()
+    diff = observed - expected
+    if (r-1)*(k-1) == 1:
+        diff = np.sign(diff) * np.maximum(np.abs(diff) - 0.5, 0)
+    return(float((diff**2 / expected).sum()))
 
 def cramers_corrected_stat(confusion_matrix):
     """
@@ -23,19 +51,274 @@ def cramers_corrected_stat(confusion_matrix):
     ---------------------------
     float : Cramer's V statistic with bias correction
     """
-    chi2 = ss.chi2_contingency(confusion_matrix)[0]
-    n = confusion_matrix.sum()
-    phi2 = chi2/n
     r,k = confusion_matrix.shape
+    return(_corrected_v(_chi2_stat(confusion_matrix),
+                        confusion_matrix.sum(), r, k))
+
+def _corrected_v(chi2, n, r, k):
+    """
+    Cramers V with bias correction of a table of n counts with r
+    non-empty rows and k non-empty columns from its chi2 statistic
+    """
+    phi2 = chi2/n
     phi2corr = max(0, phi2 - ((k-1)*(r-1))/(n-1))    
     rcorr = r - ((r-1)**2)/(n-1)
     kcorr = k - ((k-1)**2)/(n-1)
-    return(np.sqrt(phi2corr / min( (kcorr-1), (rcorr-1))))
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        return(np.sqrt(np.float64(phi2corr) / min( (kcorr-1), (rcorr-1))))
+
+def _factorize(df):
+    """
+    Integer codes of every column of df; missing values are -1
+    
+    Returns
+    ---------------------------
+    list of (codes, number of levels, has missing values) tuples
+    """
+    cols = []
+    for c in df.columns:
+        codes, levels = pd.factorize(df[c])
+        cols.append((codes.astype(np.int64), len(levels), bool((codes < 0).any())))
+    return(cols)
+
+def _full_table(a, b):
+    """
+    Contingency table of two factorized columns from _factorize,
+    with a row and column for every level
+    """
+    (a, ka, a_na), (b, kb, b_na) = a, b
+    if a_na or b_na:
+        m = (a >= 0) & (b >= 0)
+        a, b = a[m], b[m]
+    return(np.bincount(a*kb + b, minlength = ka*kb).reshape(ka,kb))
+
+def _drop_empty(t):
+    return(t[t.sum(axis = 1) > 0][:, t.sum(axis = 0) > 0])
+
+def _contingency_table(a, b):
+    """
+    Contingency table of two factorized columns from _factorize,
+    without empty rows or columns, as pandas.crosstab builds it
+    """
+    return(_drop_empty(_full_table(a, b)))
+
+# largest number of cells of the dense contingency table of a pair;
+# larger tables are reduced to their non-empty cells
+_DENSE_CELLS = 10**7
+
+def _sparse_table(a, b):
+    """
+    Contingency table of two factorized columns from _factorize as a
+    scipy.sparse.csr_matrix of its non-empty cells
+    """
+    (a, ka, a_na), (b, kb, b_na) = a, b
+    if a_na or b_na:
+        m = (a >= 0) & (b >= 0)
+        a, b = a[m], b[m]
+    return(csr_matrix((np.ones(len(a), dtype = np.int64), (a, b)),
+                      shape = (ka, kb)))
+
+def _margins(t):
+    t = t.tocoo()
+    t.sum_duplicates()
+    t.eliminate_zeros()
+    rows = np.asarray(t.sum(axis = 1), dtype = float).ravel()
+    cols = np.asarray(t.sum(axis = 0), dtype = float).ravel()
+    return(t, rows, cols)
+
+def _sparse_stat(t):
+    """
+    cramers_corrected_stat of a scipy.sparse contingency table, from
+    the counts of its non-empty cells only: chi2 is n times the sum of
+    count**2 / (row total * column total), less n. Such tables have
+    several degrees of freedom, so no continuity correction applies;
+    those with at most one are small and computed densely.
+    """
+    t, rows, cols = _margins(t)
+    n = rows.sum()
+    if n == 0:
+        return(np.nan)
+    r, k = (rows > 0).sum(), (cols > 0).sum()
+    if (r-1)*(k-1) <= 1:
+        return(cramers_corrected_stat(
+            t.tocsr()[rows > 0][:, cols > 0].toarray()))
+    chi2 = n*((t.data**2 / (rows[t.row] * cols[t.col])).sum() - 1)
+    return(_corrected_v(chi2, n, r, k))
+
+def _table_stat(t):
+    """
+    cramers_corrected_stat of a dense or scipy.sparse contingency
+    table, which may contain empty rows or columns
+    """
+    if issparse(t):
+        return(_sparse_stat(t))
+    return(cramers_corrected_stat(_drop_empty(t)))
+
+def _pair_stat(a, b):
+    """
+    cramers_corrected_stat of two factorized columns from _factorize.
+    Tables of more than _DENSE_CELLS cells, e.g. of two identifiers,
+    are computed from the counts of their non-empty cells only.
+    """
+    if a[1]*b[1] <= _DENSE_CELLS:
+        return(cramers_corrected_stat(_contingency_table(a, b)))
+    return(_sparse_stat(_sparse_table(a, b)))
+
+def _cramers_corrected_batch(tables):
+    """
+    cramers_corrected_stat of a stack of contingency tables of equal
+    shape, which may contain empty rows or columns
+    
+    Parameters
+    --------------------------
+    tables : numpy array of counts with shape (number of tables, r, k)
+        
+    Returns
+    ---------------------------
+    numpy array of Cramer's V statistics with bias correction
+    """
+    t = np.asarray(tables, dtype = float)
+    n = t.sum(axis = (1,2))
+    rows = t.sum(axis = 2)
+    cols = t.sum(axis = 1)
+    r = (rows > 0).sum(axis = 1)
+    k = (cols > 0).sum(axis = 1)
+    dof = (r-1)*(k-1)
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        expected = rows[:,:,None] * cols[:,None,:] / n[:,None,None]
+        diff = t - expected
+        diff = np.where((dof == 1)[:,None,None],
+                        np.sign(diff) * np.maximum(np.abs(diff) - 0.5, 0),
+                        diff)
+        chi2 = np.where(expected > 0, diff**2 / expected, 0).sum(axis = (1,2))
+        chi2[dof == 0] = 0
+        phi2corr = np.maximum(0, chi2/n - dof/(n-1))
+        rcorr = r - ((r-1)**2)/(n-1)
+        kcorr = k - ((k-1)**2)/(n-1)
+        return(np.sqrt(phi2corr / np.minimum(kcorr-1, rcorr-1)))
+
+def _small_sample(confusion_matrix):
+    """
+    Cochran's rule: the chi-squared approximation is unreliable if any
+    expected count is below 1 or more than 20% are below 5. For a
+    scipy.sparse table the expected counts are counted from the
+    margins without building them.
+    """
+    if issparse(confusion_matrix):
+        _, rows, cols = _margins(confusion_matrix)
+        rows, cols = rows[rows > 0], np.sort(cols[cols > 0])
+        n = rows.sum()
+        if n == 0:
+            return(True)
+        # cells of row i with expected count below 5 are the columns
+        # with a total below 5*n / rows[i]
+        below = np.searchsorted(cols, 5*n/rows, side = 'left').sum()
+        return(bool(rows.min()*cols[0]/n < 1 or
+                    below / (len(rows)*len(cols)) > 0.2))
+    t = _drop_empty(np.asarray(confusion_matrix, dtype = float))
+    if t.size == 0:
+        return(True)
+    expected = np.outer(t.sum(axis = 1), t.sum(axis = 0)) / t.sum()
+    return(bool((expected < 1).any() or (expected < 5).mean() > 0.2))
+
+_FACTORIZED = None
 
-def cramers_corrected_matrix(df, reorder_cuthill_mckee = True):
+def _init_worker(factorized):
+    global _FACTORIZED
+    _FACTORIZED = factorized
+
+def _pairs_stat(pairs, factorized = None):
+    if factorized is None: factorized = _FACTORIZED
+    return([_pair_stat(factorized[i], factorized[j]) for i,j in pairs])
+
+def _subsample(factorized, rows):
+    """
+    Factorized columns from _factorize restricted to rows, with their
+    levels renumbered so that only the levels present are counted
+    """
+    cols = []
+    for codes, k, na in factorized:
+        levels, codes = np.unique(codes[rows], return_inverse = True)
+        na = len(levels) > 0 and levels[0] < 0
+        cols.append((codes.astype(np.int64) - na, len(levels) - na, bool(na)))
+    return(cols)
+
+def _sampled_upper(confusion_matrix, n_boot, z, rng):
+    """
+    Upper confidence limit of cramers_corrected_stat from a table of
+    sampled rows: the sample statistic plus z times the larger of its
+    bootstrap standard error and 1/sqrt(n). Infinite if the sample
+    statistic is undefined, so that such pairs are never pruned.
+    """
+    t = confusion_matrix
+    v = cramers_corrected_stat(t) if min(t.shape) > 1 else np.nan
+    if np.isnan(v):
+        return(np.inf)
+    n = t.sum()
+    tables = rng.multinomial(n, t.ravel()/n, size = n_boot)
+    se = np.nanstd(_cramers_corrected_batch(tables.reshape((n_boot,) + t.shape)),
+                   ddof = 1)
+    return(v + z*np.nanmax([se, 1/np.sqrt(n)]))
+
+# largest number of cells, over all bootstrap replicates, of the
+# sampled tables of a pair screened by _pairs_upper
+_SCREEN_CELLS = 10**7
+
+def _pairs_upper(pairs, factorized = None, n_boot = 30, z = 3.0, seed = 0):
+    """
+    _sampled_upper of every pair, or inf (never pruned) for pairs
+    whose tables would exceed _SCREEN_CELLS, so that screening costs
+    no more memory than a bounded number of small tables
+    """
+    if factorized is None: factorized = _FACTORIZED
+    return([np.inf if factorized[i][1]*factorized[j][1]*n_boot > _SCREEN_CELLS
+            else _sampled_upper(_contingency_table(factorized[i], factorized[j]),
+                                n_boot, z, np.random.default_rng([seed, i, j]))
+            for i,j in pairs])
+
+class _PairMapper:
+    """
+    Compute cramers_corrected_stat, or another function of the
+    factorized columns with the signature of _pairs_stat, for lists of
+    column pairs, in a process pool holding the factorized columns if
+    n_jobs is not 1
+    """
+    
+    def __init__(self, factorized, n_jobs = 1, func = None):
+        self._factorized = factorized
+        self._func = _pairs_stat if func is None else func
+        self._n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+        self._pool = None
+        if self._n_jobs is not None and self._n_jobs > 1:
+            self._pool = ProcessPoolExecutor(
+                max_workers = self._n_jobs,
+                initializer = _init_worker,
+                initargs = (factorized,))
+            
+    def __enter__(self):
+        return(self)
+    
+    def __exit__(self, *args):
+        if self._pool is not None:
+            self._pool.shutdown()
+            
+    def map(self, pairs):
+        if self._pool is None or len(pairs) < 2:
+            return(self._func(pairs, self._factorized))
+        chunks = [pairs[i::self._n_jobs] for i in range(self._n_jobs)]
+        results = list(self._pool.map(self._func, chunks))
+        stats = [None]*len(pairs)
+        for i in range(self._n_jobs):
+            stats[i::self._n_jobs] = results[i]
+        return(stats)
+
+def cramers_corrected_matrix(df, reorder_cuthill_mckee = True, n_jobs = 1,
+                             sample_size = None, random_state = None):
     """
     Calculate Cramers V statistic with bias correction for all
-    combinations of columns in pandas DataFrame df
+    combinations of columns in pandas DataFrame df. Each column is
+    factorized to integer codes once and contingency tables are built
+    with numpy.bincount on combined codes.
     
     Parameters
     --------------------------
@@ -44,28 +327,47 @@ def cramers_corrected_matrix(df, reorder_cuthill_mckee = True):
     reorder_cuthill_mckee : boolean - whether to reorder to the columns
         based on the reverse Cuthill McKee algorithm applied to the
         matrix of Cramers V statistics
+    
+    n_jobs : int - number of processes over which to spread the
+        column pairs; -1 uses all cores
+    
+    sample_size : int - if given and smaller than the number of rows,
+        estimate the statistics from a simple random sample of this
+        many rows. See CramersAccumulator for standard errors.
+    
+    random_state : int or numpy Generator used for sampling
         
     Returns
     ---------------------------
     Z : numpy array with Cramers V statistics
     """
+    if sample_size is not None and sample_size < len(df):
+        df = df.sample(sample_size, random_state = random_state)
     cols = df.columns.tolist()
     Z = np.zeros((len(cols),len(cols)))
+    factorized = _factorize(df)
+    pairs = list(combinations_with_replacement(range(len(cols)),2))
+    
+    with _PairMapper(factorized, n_jobs) as mapper:
+        stats = mapper.map(pairs)
     
-    for i,j in combinations_with_replacement(range(len(cols)),2):
-        z = cramers_corrected_stat(
-                pd.crosstab(df[cols[i]],df[cols[j]]).values
-            )
+    for (i,j), z in zip(pairs, stats):
         Z[i,j] = Z[j,i] = z
         
+    return(_to_frame(Z, cols, reorder_cuthill_mckee))
+
+def _to_frame(Z, cols, reorder_cuthill_mckee):
+    """
+    DataFrame of the matrix Z of statistics between columns cols,
+    optionally reordered by the reverse Cuthill McKee algorithm
+    """
     if reorder_cuthill_mckee is True:
         perm = reverse_cuthill_mckee(
             csr_matrix(Z),
             symmetric_mode = True
         )
         cols = [cols[i] for i in perm]
-        gx,gy = np.meshgrid(perm,perm)
-        Z = (csr_matrix(Z)[gx,gy]).toarray()
+        Z = Z[np.ix_(perm,perm)]
         
     Z = pd.DataFrame(
             Z,
@@ -73,4 +375,367 @@ def cramers_corrected_matrix(df, reorder_cuthill_mckee = True):
             columns = cols
         )
     
-    return(Z)
\ No newline at end of file
+    return(Z)
+
+def _cramers_bound(r, k, n):
+    """
+    Upper bound of cramers_corrected_stat for a table of n counts
+    with r non-empty rows and k non-empty columns: chi2/n is at most
+    min(r,k) - 1, and the continuity correction only lowers it
+    """
+    r = np.asarray(r, dtype = float)
+    k = np.asarray(k, dtype = float)
+    rcorr = r - ((r-1)**2)/(n-1)
+    kcorr = k - ((k-1)**2)/(n-1)
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        v2 = np.maximum(0, np.minimum(r,k) - 1 - (k-1)*(r-1)/(n-1)) \
+            / np.minimum(kcorr-1, rcorr-1)
+    return(np.sqrt(v2))
+
+def cramers_associations(df, threshold = None, top_k = None,
+                         output = 'edges', n_jobs = 1, batch_size = 10000,
+                         sample_size = None, n_boot = 30, z = 3.0,
+                         random_state = None):
+    """
+    Find the strongly associated pairs of columns in pandas DataFrame
+    df without building the dense matrix of cramers_corrected_matrix.
+    
+    Pairs whose upper bound, from their numbers of levels and rows,
+    cannot reach the threshold are skipped without building their
+    contingency table; only these pairs are pruned by default. Pairs
+    are evaluated in batches in decreasing order of their bounds, and
+    skipped once the bound is below the k-th best statistic found so
+    far for both columns, so the top-k thresholds rise quickly. Pairs
+    below the top-k thresholds of both their columns are dropped after
+    every batch, so memory grows with the pairs kept, not evaluated.
+    
+    The bound from the numbers of levels is close to 1 unless columns
+    have many levels relative to the number of rows, so by default
+    (sample_size = None) nearly every pair is evaluated: this exact
+    mode costs as much time as cramers_corrected_matrix and does not
+    scale to many columns. Set sample_size to prune.
+    
+    If sample_size is given and smaller than the number of rows, every
+    pair is also screened on a random sample of sample_size rows, and
+    its bound lowered to the sample statistic plus z times its
+    bootstrap standard error (at least z times 1/sqrt(sample_size)).
+    This screening is probabilistic - a pair may be missed if its
+    sample statistic is more than z standard errors below its
+    statistic on df - and pays off for many columns with few levels
+    and many rows. Pairs whose bootstrap tables would hold more than
+    _SCREEN_CELLS cells are not screened.
+    
+    Parameters
+    --------------------------
+    df : pandas DataFrame - all columns must be categorical
+    
+    threshold : float - keep pairs with a statistic of at least this
+    
+    top_k : int - keep pairs that are among the top_k partners of at
+        least one of their columns (ties included)
+    
+    output : str
+        'edges' - pandas DataFrame with columns 'x', 'y' and
+            'cramers_v', sorted by decreasing statistic
+        'sparse' - symmetric scipy.sparse.csr_matrix with rows and
+            columns in the order of df.columns
+    
+    n_jobs : int - number of processes over which to spread the
+        column pairs; -1 uses all cores
+    
+    batch_size : int - number of pairs evaluated between updates of
+        the top-k thresholds
+    
+    sample_size : None or int - number of rows on which pairs are
+        screened; None only prunes pairs that cannot pass
+    
+    n_boot : int - number of bootstrap replicates of the screening
+        sample for the standard errors
+    
+    z : float - number of standard errors added to the sample
+        statistic; larger values prune fewer pairs and miss fewer
+    
+    random_state : int or numpy Generator - seed of the screening
+        sample and bootstrap
+        
+    Returns
+    ---------------------------
+    pandas DataFrame or scipy.sparse.csr_matrix, see output
+    """
+    if threshold is None and top_k is None:
+        raise ValueError("At least one of threshold and top_k is required")
+    if output not in ['edges','sparse']:
+        raise ValueError("output must be one of 'edges' or 'sparse'")
+    cols = df.columns.tolist()
+    p = len(cols)
+    n = len(df)
+    factorized = _factorize(df)
+    levels = np.array([f[1] for f in factorized])
+    missing = np.array([f[2] for f in factorized], dtype = bool)
+    
+    i, j = np.triu_indices(p, 1)
+    bound = _cramers_bound(levels[i], levels[j], n)
+    # dropping missing values pairwise changes the numbers of rows
+    # and levels, so the bound does not hold for such pairs
+    bound[missing[i] | missing[j]] = np.inf
+    keep = ~np.isnan(bound)
+    if threshold is not None:
+        keep &= bound >= threshold
+    i, j, bound = i[keep], j[keep], bound[keep]
+    
+    if sample_size is not None and sample_size < n:
+        rng = np.random.default_rng(random_state)
+        rows = np.sort(rng.choice(n, sample_size, replace = False))
+        upper = partial(_pairs_upper, n_boot = n_boot, z = z,
+                        seed = int(rng.integers(2**32)))
+        with _PairMapper(_subsample(factorized, rows), n_jobs,
+                         upper) as mapper:
+            bound = np.minimum(bound, mapper.map(
+                list(zip(i.tolist(), j.tolist()))))
+        if threshold is not None:
+            keep = bound >= threshold
+            i, j, bound = i[keep], j[keep], bound[keep]
+    
+    order = np.argsort(-bound, kind = 'stable')
+    i, j, bound = i[order], j[order], bound[order]
+    
+    heaps = [[] for _ in range(p)]
+    kth = np.full(p, -np.inf)
+    a = np.zeros(0, dtype = int)
+    b = np.zeros(0, dtype = int)
+    v = np.zeros(0)
+    with _PairMapper(factorized, n_jobs) as mapper:
+        for start in range(0, len(i), batch_size):
+            bi = i[start:start+batch_size]
+            bj = j[start:start+batch_size]
+            bb = bound[start:start+batch_size]
+            if top_k is not None:
+                m = (bb >= kth[bi]) | (bb >= kth[bj])
+                bi, bj = bi[m], bj[m]
+            stats = np.array(mapper.map(list(zip(bi.tolist(), bj.tolist()))),
+                             dtype = float)
+            m = ~np.isnan(stats)
+            if threshold is not None:
+                m &= stats >= threshold
+            a = np.concatenate([a, bi[m]])
+            b = np.concatenate([b, bj[m]])
+            v = np.concatenate([v, stats[m]])
+            if top_k is None:
+                continue
+            for c, s in zip(np.concatenate([bi[m], bj[m]]).tolist(),
+                            np.tile(stats[m], 2).tolist()):
+                if len(heaps[c]) < top_k:
+                    heapq.heappush(heaps[c], s)
+                else:
+                    heapq.heappushpop(heaps[c], s)
+                if len(heaps[c]) == top_k:
+                    kth[c] = heaps[c][0]
+            # thresholds only rise, so pairs below both can be dropped now
+            keep = (v >= kth[a]) | (v >= kth[b])
+            a, b, v = a[keep], b[keep], v[keep]
+                        
+    order = np.argsort(-v, kind = 'stable')
+    a, b, v = a[order], b[order], v[order]
+    
+    if output == 'sparse':
+        Z = csr_matrix((v, (a, b)), shape = (p, p))
+        return((Z + Z.T).tocsr())
+    cols = np.array(cols, dtype = object)
+    return(pd.DataFrame({'x': cols[a], 'y': cols[b], 'cramers_v': v}))
+
+def reservoir_sample(chunks, sample_size, random_state = None):
+    """
+    Simple random sample of rows from an iterable of DataFrames, e.g.
+    the reader returned by pandas.read_csv(..., chunksize = n), in a
+    single pass holding at most sample_size rows (reservoir sampling,
+    algorithm R, vectorized per chunk)
+    
+    Parameters
+    --------------------------
+    chunks : iterable of pandas DataFrames with the same columns
+    
+    sample_size : int - number of rows to sample
+    
+    random_state : int or numpy Generator
+        
+    Returns
+    ---------------------------
+    pandas DataFrame with min(sample_size, total rows) rows, in no
+        particular order and with a new RangeIndex
+    """
+    rng = np.random.default_rng(random_state)
+    sample = None
+    seen = 0
+    for chunk in chunks:
+        if sample is None:
+            sample = chunk.iloc[:0]
+        fill = max(0, min(sample_size - len(sample), len(chunk)))
+        sample = pd.concat([sample, chunk.iloc[:fill]], ignore_index = True)
+        # row i of the chunk replaces a random slot with probability
+        # sample_size / (number of rows seen including row i)
+        slots = rng.integers(0, seen + np.arange(fill, len(chunk)) + 1)
+        rows = np.flatnonzero(slots < sample_size) + fill
+        slots = slots[rows - fill]
+        # a slot hit twice keeps the later row
+        slots, last = np.unique(slots[::-1], return_index = True)
+        rows = rows[::-1][last]
+        keep = np.ones(len(sample), dtype = bool)
+        keep[slots] = False
+        sample = pd.concat([sample[keep], chunk.iloc[rows]],
+                           ignore_index = True)
+        seen += len(chunk)
+    return(sample)
+
+class CramersAccumulator:
+    """
+    Accumulate contingency tables of all pairs of columns over chunks
+    of data, e.g. the reader returned by pandas.read_csv(...,
+    chunksize = n) or a list of samples, and estimate Cramers V
+    statistics with bias correction from them. Only the tables are
+    kept in memory, so the result equals cramers_corrected_matrix on
+    the concatenated chunks. Tables of more than _DENSE_CELLS cells,
+    e.g. of two identifiers, are kept as scipy.sparse matrices of
+    their non-empty cells, and the diagonal is derived from the level
+    counts of each column.
+    
+    Parameters
+    ----------
+    cols : optional list of columns to use; defaults to all columns of
+        the first chunk
+    """
+    
+    def __init__(self, cols = None):
+        self.cols = cols
+        self._levels = None
+        self._counts = None
+        self._tables = None
+        
+    def update(self, df):
+        """
+        Add the rows of DataFrame df to the contingency tables
+        """
+        if self.cols is None:
+            self.cols = df.columns.tolist()
+        if self._levels is None:
+            self._levels = [pd.Index([]) for _ in self.cols]
+            self._counts = [np.zeros(0, dtype = np.int64) for _ in self.cols]
+            self._tables = {}
+        factorized = []
+        for i, c in enumerate(self.cols):
+            new = pd.Index(df[c].dropna().unique()).difference(
+                self._levels[i], sort = False)
+            if len(new) > 0:
+                self._levels[i] = self._levels[i].append(new)
+            codes = self._levels[i].get_indexer(df[c]).astype(np.int64)
+            factorized.append((codes, len(self._levels[i]),
+                               bool((codes < 0).any())))
+            counts = np.bincount(codes[codes >= 0],
+                                 minlength = len(self._levels[i]))
+            counts[:len(self._counts[i])] += self._counts[i]
+            self._counts[i] = counts
+        for i,j in combinations(range(len(self.cols)),2):
+            self._tables[(i,j)] = self._add_table(
+                self._tables.get((i,j)), factorized[i], factorized[j])
+        return(self)
+    
+    @staticmethod
+    def _add_table(old, a, b):
+        """
+        Add the contingency table of factorized columns a and b to
+        old, the table of the previous chunks (None if there were
+        none), whose levels are the first ones of a and b
+        """
+        if a[1]*b[1] <= _DENSE_CELLS and not issparse(old):
+            t = _full_table(a, b)
+            if old is not None:
+                t[:old.shape[0], :old.shape[1]] += old
+            return(t)
+        t = _sparse_table(a, b)
+        if old is not None:
+            old = csr_matrix(old, copy = True)
+            old.resize(t.shape)
+            t = t + old
+        return(t)
+    
+    def _check_if_updated(self):
+        if self._tables is None:
+            raise Exception("No data accumulated yet")
+    
+    def _matrix(self, func):
+        self._check_if_updated()
+        Z = np.zeros((len(self.cols),len(self.cols)))
+        for (i,j), t in self._tables.items():
+            Z[i,j] = Z[j,i] = func(t)
+        for i, counts in enumerate(self._counts):
+            # the table of a column with itself is diagonal
+            levels = np.flatnonzero(counts)
+            Z[i,i] = func(coo_matrix((counts[levels], (levels, levels)),
+                                     shape = (len(counts), len(counts))))
+        return(Z)
+    
+    def matrix(self, reorder_cuthill_mckee = True):
+        """
+        Cramers V statistics with bias correction
+        
+        Parameters
+        ----------
+        reorder_cuthill_mckee : boolean - see cramers_corrected_matrix
+        
+        Returns
+        -------
+        pandas DataFrame
+        """
+        Z = self._matrix(_table_stat)
+        return(_to_frame(Z, self.cols, reorder_cuthill_mckee))
+    
+    def standard_errors(self, n_boot = 200, random_state = None):
+        """
+        Bootstrap standard errors of the statistics in matrix, from
+        multinomial resampling of each contingency table. Replicates
+        are drawn in one batch if they hold at most _DENSE_CELLS cells
+        together, and one at a time over the non-empty cells otherwise.
+        
+        Parameters
+        ----------
+        n_boot : int - number of bootstrap replicates per table
+        
+        random_state : int or numpy Generator
+        
+        Returns
+        -------
+        pandas DataFrame in the order of cols
+        """
+        rng = np.random.default_rng(random_state)
+        
+        def se(t):
+            n = t.sum()
+            if n < 2:
+                return(np.nan)
+            if not issparse(t):
+                t = _drop_empty(t)
+            if issparse(t) or t.size*n_boot > _DENSE_CELLS:
+                t, _, _ = _margins(coo_matrix(t))
+                v = np.array([_sparse_stat(coo_matrix(
+                    (rng.multinomial(n, t.data / n), (t.row, t.col)),
+                    shape = t.shape)) for _ in range(n_boot)])
+            else:
+                tables = rng.multinomial(n, t.ravel() / n, size = n_boot)
+                v = _cramers_corrected_batch(
+                    tables.reshape((n_boot,) + t.shape))
+            return(np.nanstd(v, ddof = 1) if np.isfinite(v).sum() > 1
+                   else np.nan)
+        
+        return(_to_frame(self._matrix(se), self.cols, False))
+    
+    def small_sample(self):
+        """
+        Flag pairs whose contingency table fails Cochran's rule (any
+        expected count below 1 or more than 20% below 5), for which
+        the statistics are unreliable
+        
+        Returns
+        -------
+        boolean pandas DataFrame in the order of cols
+        """
+        Z = self._matrix(_small_sample).astype(bool)
+        return(_to_frame(Z, self.cols, False))
@@ -0,0 +1,95 @@
+import pytest
+import pandas as pd
+import numpy as np
+
+from dsutils.utils.binners import *
+from dsutils.utils.binners import _label_constructor, _remove_closest, \
+    _fit_cuts, _bin_codes, _value_codes
+
+@pytest.fixture
+def example_matrix():
+    rng = np.random.default_rng(0)
+    return(np.column_stack(
+        [rng.lognormal(size = 500) * 10.0**p for p in range(-3,5)]))
+
+
+@pytest.mark.parametrize('cuts', ['linear','log','logp1','quantile'])
+def test_cutpoints_matrix(example_matrix, cuts):
+    res = cutpoints_matrix(example_matrix, cuts = cuts, ncuts = 12)
+    for j in range(example_matrix.shape[1]):
+        np.testing.assert_array_equal(
+            res[j], cutpoints(example_matrix[:,j], cuts = cuts, ncuts = 12))
+
+
+def test_human_readable_nums():
+    rng = np.random.default_rng(0)
+    x = np.concatenate([
+        rng.normal(0, 10.0**rng.integers(-6, 16, 500)),
+        [0, 1, 10, 999.5, 1e20, -1e-9, 2.5, 2.5, np.nan]])
+    expected = [human_readable_num(v, sig_fig = 4) for v in x]
+    assert list(human_readable_nums(x, sig_fig = 4)) == expected
+    assert list(human_readable_nums(np.array([3, 1200]))) == ['3', '1.2K']
+
+
+def test_label_constructor():
+    bin_labels, pm_labels = _label_constructor(
+        np.array([0, 1.5, 2, 3.25, 1e4]), np.array([1.5, 1e4]))
+    assert bin_labels == ['01: [0, 1.5)', '03: (1.5, 2]',
+                          '04: (2, 3.25]', '05: (3.25, 10K)']
+    assert pm_labels == ['02: 1.5', '06: 10K']
+
+
+@pytest.mark.parametrize('x, y, exclude_endpoints, expected', [
+    ([0, 1, 2, 3, 4], [2.2], True, [0, 1, 3, 4]),
+    # ties go to the lower cut point
+    ([0, 1, 2, 3, 4], [1.5], True, [0, 2, 3, 4]),
+    ([0, 1, 2, 3, 4], [1.1, 0.9, 2.9], True, [0, 2, 4]),
+    ([0, 1, 2, 3, 4], [-5, 10], True, [0, 2, 4]),
+    ([0, 1, 2, 3, 4], [1.1], False, [0, 1, 3, 4]),
+    ([0, 4], [1.1], True, [0, 4]),
+    ([0, 1, 2, 3], [], True, [0, 1, 2, 3]),
+])
+def test_remove_closest(x, y, exclude_endpoints, expected):
+    z = _remove_closest(np.array(x, dtype = float), np.array(y, dtype = float),
+                        exclude_endpoints = exclude_endpoints)
+    np.testing.assert_array_equal(z, expected)
+
+
+def test_cutter_point_mass():
+    rng = np.random.default_rng(0)
+    x = np.where(rng.random(5000) < .3, 0.0, rng.normal(size = 5000))
+    x[::50] = np.nan
+    df = pd.DataFrame({'x': x})
+    z = cutter(df, 'x', max_levels = 10)
+    assert list(z.categories) == sorted(z.categories)
+    pm_code = list(z.categories).index('07: 0')
+    assert (z.codes[x == 0] == pm_code).all()
+    assert (z.codes[x < 0] < pm_code).all()
+    assert (z.codes[x > 0] > pm_code).all()
+    assert (z.codes[np.isnan(x)] == -1).all()
+    assert (z.codes[~np.isnan(x)] >= 0).all()
+
+
+@pytest.mark.parametrize('clip', [False, True])
+def test_bin_codes_edges(clip):
+    rng = np.random.default_rng(0)
+    x = np.concatenate([np.zeros(300), rng.normal(size = 1000).round(1),
+                        [np.nan]])
+    bins = _fit_cuts(pd.Series(x), max_levels = 6)
+    edges = np.concatenate([bins['cuts'], bins['pm']])
+    y = np.concatenate([x, rng.normal(scale = 5, size = 500), edges,
+                        np.nextafter(edges, -np.inf),
+                        np.nextafter(edges, np.inf), [np.inf, -np.inf]])
+    np.testing.assert_array_equal(_bin_codes(y, bins, clip),
+                                  _value_codes(y, bins, clip))
+
+
+@pytest.mark.parametrize('clip', [False, True])
+def test_bin_codes_single_point_mass(clip):
+    bins = _fit_cuts(pd.Series([2.0]*50 + [np.nan]))
+    assert len(bins['cuts']) <= 1 and len(bins['pm']) == 1
+    y = np.array([-5, 1.9, 2, 2.1, 9, np.inf, -np.inf, np.nan])
+    expected = [0]*7 + [-1] if clip else [-1, -1, 0, -1, -1, -1, -1, -1]
+    np.testing.assert_array_equal(_bin_codes(y, bins, clip), expected)
+    np.testing.assert_array_equal(_bin_codes(y, bins, clip),
+                                  _value_codes(y, bins, clip))
@@ -22,29 +22,81 @@ def test_max_level_binner(example_data):
     response = pd.DataFrame({
         'x':['a','a','b','_OTHER_','b','a','a'],
         'y':['a','b','_OTHER_','_OTHER_','_OTHER_','a','b']
-    })
+    }).astype('category')
     mlb = MaxLevelBinner(x = ['x','y'], max_levels = 2, other_val = '_OTHER_')
     ft = mlb.fit_transform(example_data)
-    assert ft.equals(response)
+    pd.testing.assert_frame_equal(ft, response, check_categorical = False)
     
     
 def test_percent_threshold_binner(example_data):
     response = pd.DataFrame({
         'x':['a','a','b','_OTHER_','b','a','a'],
         'y':['a','b','_OTHER_','_OTHER_','_OTHER_','a','b']
-    })
+    }).astype('category')
     ptb = PercentThresholdBinner(
         x = ['x','y'], percent_threshold = 0.15, other_val = '_OTHER_')
     ft = ptb.fit_transform(example_data)
-    assert ft.equals(response)
+    pd.testing.assert_frame_equal(ft, response, check_categorical = False)
     
 #CumulativePercentThresholdBinner
 def test_cumulative_percent_threshold_binner(example_data):
     response = pd.DataFrame({
         'x':['a','a','b','_OTHER_','b','a','a'],
         'y':['a','b','c','d','_OTHER_','a','b']
-    })
+    }).astype('category')
     cptb = CumulativePercentThresholdBinner(
         x = ['x','y'], cum_percent = 0.85, other_val = '_OTHER_')
     ft = cptb.fit_transform(example_data)
-    assert ft.equals(response)
+    pd.testing.assert_frame_equal(ft, response, check_categorical = False)
+
+
+def test_binner_keeps_missing(example_data_na):
+    mlb = MaxLevelBinner(x = 'x', max_levels = 1, other_val = '_OTHER_')
+    ft = mlb.fit_transform(example_data_na)
+    assert ft.x.dtype == 'category'
+    assert ft.x.isna().sum() == 2
+    assert ft.x.dropna().tolist() == \
+        ['a','a','_OTHER_','_OTHER_','_OTHER_','a','a']
+
+
+def test_binner_unseen_levels(example_data):
+    mlb = MaxLevelBinner(x = 'x', max_levels = 2)
+    mlb.fit(example_data)
+    ft = mlb.transform(pd.DataFrame({'x':['a','z',np.nan]}))
+    assert ft.x.tolist()[:2] == ['a','_OTHER_']
+    assert pd.isna(ft.x.tolist()[2])
+
+
+def test_chunked_fit_matches_fit(example_data):
+    for cls in [MaxLevelBinner, PercentThresholdBinner,
+                CumulativePercentThresholdBinner]:
+        full = cls(x = ['x','y'])
+        full.fit(example_data)
+        chunked = cls(x = ['x','y'])
+        chunked.fit_iter(
+            example_data.iloc[i:i+3] for i in range(0,7,3))
+        partial = cls(x = ['x','y'])
+        partial.partial_fit(example_data.iloc[:4])
+        partial.partial_fit(example_data.iloc[4:])
+        assert full._map == chunked._map == partial._map
+
+
+def test_sketch_fit_keeps_heavy_hitters():
+    rng = np.random.default_rng(0)
+    x = np.where(rng.random(20000) < 0.5,
+                 rng.integers(0, 5, 20000),
+                 rng.integers(5, 10**5, 20000)).astype(str)
+    df = pd.DataFrame({'x':x})
+    mlb = MaxLevelBinner(x = 'x', max_levels = 5, sketch_size = 20)
+    mlb._sketch_block_size = 1000
+    mlb.fit(df)
+    assert len(mlb._counts['x']) <= 20
+    assert sorted(mlb._map['x']) == ['0','1','2','3','4']
+
+
+def test_n_jobs_matches_serial(example_data):
+    serial = MaxLevelBinner(x = ['x','y'], max_levels = 2)
+    threaded = MaxLevelBinner(x = ['x','y'], max_levels = 2, n_jobs = 2)
+    pd.testing.assert_frame_equal(
+        serial.fit_transform(example_data),
+        threaded.fit_transform(example_data))
@@ -0,0 +1,53 @@
+import pytest
+import pandas as pd
+import numpy as np
+
+from dsutils.transformers._date_transformers import *
+
+COMPONENTS = {
+    'year':'_YEAR', 'month':'_MONTH', 'day':'_DAY',
+    'dayofweek':'_DOW', 'dayofyear':'_DOY', 'quarter':'_Q',
+    'hour':'_HOUR', 'epoch_days':'_EPOCH_DAYS'}
+
+@pytest.fixture
+def example_data():
+    return(pd.DataFrame(
+    {'d':pd.to_datetime(['1900-02-28 01:00', '1969-12-31 23:59',
+                         '2000-02-29 12:30', '2020-12-31 23:00']),
+     'e':pd.to_datetime(['2021-01-01 00:00', None, '1999-07-04 00:00',
+                         '2024-03-01 00:00'])}
+    ))
+
+
+def _expected(d):
+    return({
+        '_YEAR':d.dt.year, '_MONTH':d.dt.month, '_DAY':d.dt.day,
+        '_DOW':d.dt.dayofweek, '_DOY':d.dt.dayofyear,
+        '_Q':d.dt.quarter, '_HOUR':d.dt.hour,
+        '_EPOCH_DAYS':(d.dt.floor('D') - pd.Timestamp('1970-01-01')).dt.days})
+
+
+def test_date_components(example_data):
+    res = DateComponents(x = ['d','e'], components = COMPONENTS) \
+        .fit_transform(example_data)
+    assert res.d_YEAR.dtype == np.int16
+    assert res.d_MONTH.dtype == np.int8
+    assert res.e_YEAR.dtype == 'Int16'
+    for z in ['d','e']:
+        for pf, v in _expected(example_data[z]).items():
+            assert res[z + pf].astype(float).fillna(-1).tolist() == \
+                v.astype(float).fillna(-1).tolist()
+
+
+def test_date_components_records(example_data):
+    dc = DateComponents(x = ['d','e'], components = COMPONENTS)
+    res = dc.fit_transform(example_data)
+    records = dc.transform_records(example_data.to_dict('records'))
+    for r, (_, row) in zip(records, res.iterrows()):
+        for k, v in r.items():
+            assert (pd.isna(v) and pd.isna(row[k])) or v == row[k]
+
+
+def test_date_components_unknown():
+    with pytest.raises(ValueError):
+        DateComponents(x = 'd', components = {'week':'_WEEK'})
@@ -0,0 +1,106 @@
+import pytest
+import warnings
+import pandas as pd
+import numpy as np
+
+from dsutils.utils.histograms import *
+from dsutils.utils.histograms import _categorical_histogram, \
+    _numeric_histogram
+
+@pytest.fixture
+def example_data():
+    rng = np.random.default_rng(0)
+    n = 2000
+    df = pd.DataFrame({
+        'x':rng.normal(size = n),
+        'c':rng.choice(list('abcdefghij'), n),
+        'y':rng.normal(size = n)})
+    df.loc[::40,'x'] = np.nan
+    return(df)
+
+
+@pytest.mark.parametrize('c', ['c', 'i'])
+def test_histogram_accumulator_categorical(example_data, c):
+    example_data['i'] = (example_data['y']*2).round().astype(int)
+    h = HistogramAccumulator(c, 'y', kind = 'categorical', max_levels = 4)
+    for i in range(0, 2000, 300):
+        h.update(example_data.iloc[i:i+300])
+    pd.testing.assert_frame_equal(
+        h.table(),
+        _categorical_histogram(example_data, c, 'y', max_levels = 4))
+
+
+def test_histogram_accumulator_numeric(example_data):
+    full = HistogramAccumulator('x', 'y', max_levels = 8, stat = 'max')
+    full.update(example_data)
+    chunked = HistogramAccumulator('x', 'y', bins = full.bins, stat = 'max')
+    for i in range(0, 2000, 300):
+        chunked.update(example_data.iloc[i:i+300])
+    pd.testing.assert_frame_equal(full.table(), chunked.table())
+    assert full.table()._COUNT_.sum() == 2000
+    assert full.table().x.iloc[-1] == 'MISSING'
+
+
+@pytest.mark.parametrize('kind, x', [('numeric', 'x'), ('categorical', 'c')])
+def test_histogram_accumulator_counts(example_data, kind, x):
+    h = HistogramAccumulator(x, kind = kind, max_levels = 4)
+    with pytest.raises(Exception):
+        h.table()
+    for i in range(0, 2000, 300):
+        h.update(example_data.iloc[i:i+300])
+    p = h.table()
+    assert p.columns.tolist() == [x, '_COUNT_']
+    assert p['_COUNT_'].sum() == 2000
+    if kind == 'categorical':
+        pd.testing.assert_frame_equal(
+            p, _categorical_histogram(example_data, 'c', max_levels = 4),
+            check_dtype = False)
+
+
+def test_categorical_histogram():
+    df = pd.DataFrame({
+        'c':['a','a','a','b','b','c',np.nan,'d'],
+        'y':[1.0,2.0,3.0,4.0,np.nan,6.0,7.0,8.0]})
+    p = _categorical_histogram(df, 'c', 'y', max_levels = 2)
+    assert p.c.tolist() == ['_OTHER_','a','b']
+    assert p.y.tolist() == [7.0, 2.0, 4.0]
+    assert p._COUNT_.tolist() == [2, 3, 2]
+
+
+def test_categorical_histogram_ties():
+    df = pd.DataFrame({'c': ['d','c','b','a','a','d','c','b']})
+    # all levels tie; the first ones in sorted order are kept
+    p = _categorical_histogram(df, 'c', max_levels = 2)
+    assert p.c.tolist() == ['_OTHER_','a','b']
+    assert p._COUNT_.tolist() == [4, 2, 2]
+
+
+def test_numeric_histogram_no_binner():
+    df = pd.DataFrame({'x': [1.5e-3, 3e-3, 3e-3, np.nan], 'y': [1., 2, 4, 8]})
+    p = _numeric_histogram(df, 'x', ['y'], binner = False)
+    assert p['x'].tolist() == ['01: 1.5E-3', '02: 3E-3', '03: MISSING']
+    assert p['y'].tolist() == [1, 3, 8]
+
+
+def test_numeric_histogram_missing(example_data):
+    p = _numeric_histogram(example_data, 'x', ['y'], max_levels = 5)
+    assert p['x'].iloc[-1] == 'MISSING'
+    assert p['_COUNT_'].iloc[-1] == example_data['x'].isna().sum()
+    assert p['_COUNT_'].sum() == len(example_data)
+
+
+def test_numeric_histogram_no_missing():
+    df = pd.DataFrame({'x': np.linspace(1, 10, 100)})
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        p = _numeric_histogram(df, 'x', max_levels = 5)
+    assert 'MISSING' not in p['x'].tolist()
+    assert (p['_COUNT_'] > 0).all() and p['_COUNT_'].sum() == len(df)
+
+
+def test_categorical_histogram_integer_levels():
+    df = pd.DataFrame({'c': np.arange(50) % 7, 'y': np.arange(50.)})
+    p = _categorical_histogram(df, 'c', 'y', max_levels = 3)
+    assert p['c'].tolist() == [0, 1, 2, '_OTHER_']
+    assert p['_COUNT_'].tolist() == [8, 7, 7, 28]
+    assert p['y'].tolist() == [24.5, 22.0, 23.0, 25.5]
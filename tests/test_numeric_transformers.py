@@ -3,6 +3,7 @@ import pandas as pd
 import numpy as np
 
 from dsutils.transformers._numeric_transformers import *
+from dsutils.transformers._numeric_binners import *
 
 @pytest.fixture
 def example_data():
@@ -22,4 +23,143 @@ def test_outlier_percentile_capper(example_data):
         })
     res2 = OutlierPercentileCapper(
         x='x',lower = 0.01, upper = 0.99).fit_transform(example_data)
-    assert res.equals(res2)
\ No newline at end of file
+    assert res.equals(res2)
+
+def test_outlier_percentile_capper_dtypes():
+    df = pd.DataFrame({
+        'n': np.arange(100, dtype = np.int64),
+        'f': np.linspace(0, 1, 100).astype(np.float32),
+        'N': pd.array(list(range(99)) + [None], dtype = 'Int64')})
+    opc = OutlierPercentileCapper(
+        x = ['n','f','N'], lower = 0.1, upper = 0.9, n_jobs = 2)
+    res = opc.fit_transform(df)
+    assert (res.dtypes == df.dtypes).all()
+    # integer columns are clipped to the integers within the bounds
+    assert res['n'].min() == 10 and res['n'].max() == 89
+    assert res['N'].min() == 10 and res['N'].max() == 88
+    assert res['N'].isna().sum() == 1
+    np.testing.assert_allclose(
+        res['f'], np.clip(df['f'], opc._map['f']['lower'],
+                          opc._map['f']['upper']), rtol = 1e-6)
+
+def test_outlier_percentile_capper_in_place():
+    df = pd.DataFrame({'a': np.arange(10.0), 'k': list('abcdefghij'),
+                       'b': np.arange(10)}, index = np.arange(10, 20))
+    original = df.copy()
+    opc = OutlierPercentileCapper(x = ['b', 'a'], lower = 0.2, upper = 0.8)
+    opc.fit(df)
+    res = opc.transform(df)
+    pd.testing.assert_frame_equal(df, original)
+    assert list(res.columns) == ['a', 'k', 'b']
+    assert (res.index == df.index).all()
+    assert res['a'].min() == pytest.approx(1.8) and res['b'].max() == 7
+    res.loc[10, 'k'] = 'z'
+    pd.testing.assert_frame_equal(df, original)
+    assert opc.transform(df, in_place = True) is None
+    pd.testing.assert_frame_equal(df, res.assign(k = original['k']))
+
+
+def test_outlier_percentile_capper_missing_bounds():
+    df = pd.DataFrame({'n': np.arange(10), 'f': np.arange(10, dtype = float),
+                       'm': np.full(10, np.nan)})
+    opc = OutlierPercentileCapper(x = ['n','f','m'], lower = 0.15,
+                                  upper = 0.9)
+    opc.fit(df)
+    new = pd.DataFrame({'n': np.arange(10), 'f': np.arange(10, dtype = float),
+                        'm': np.arange(10, dtype = float)})
+    new['m2'] = new['n']
+    opc2 = OutlierPercentileCapper(x = 'm2')
+    opc2.fit(pd.DataFrame({'m2': pd.array([None]*10, dtype = 'Int64')}))
+    # bounds of columns that were all missing at fit do not cap
+    res = opc2.transform(opc.transform(new))
+    pd.testing.assert_series_equal(res['m'], new['m'])
+    pd.testing.assert_series_equal(res['m2'], new['m2'])
+    assert res['n'].min() == 2 and res['f'].min() == pytest.approx(1.35)
+    # the record path caps like transform
+    records = opc2.transform_records(opc.transform_records(
+        new.to_dict('records')))
+    pd.testing.assert_frame_equal(pd.DataFrame(records), res)
+
+def test_outlier_percentile_capper_records_follow_fitted_dtype():
+    opc = OutlierPercentileCapper(x = ['y', 'n'], lower = 0.25, upper = 0.75)
+    opc.fit(pd.DataFrame({'y': np.arange(6, dtype = float),
+                          'n': np.arange(6)}))
+    # a Python int sent to a float column is capped like transform does
+    records = opc.transform_records([{'y': 0, 'n': 0}])
+    res = opc.transform(pd.DataFrame({'y': [0.0], 'n': [0]}))
+    assert records[0]['y'] == res['y'][0] == pytest.approx(1.25)
+    assert records[0]['n'] == res['n'][0] == 2
+
+
+def test_outlier_percentile_capper_records_missing():
+    opc = OutlierPercentileCapper(x = 'n', lower = 0.25, upper = 0.75)
+    opc.fit(pd.DataFrame({'n': pd.array([0, 1, 2, 3, 4, 5, None],
+                                        dtype = 'Int64')}))
+    records = opc.transform_records([{'n': pd.NA}, {'n': pd.NaT},
+                                     {'n': np.nan}, {'n': 9}])
+    assert records[0]['n'] is pd.NA and records[1]['n'] is pd.NaT
+    assert np.isnan(records[2]['n']) and records[3]['n'] == 3
+
+
+def test_outlier_percentile_capper_fit_iter():
+    x = np.random.default_rng(0).normal(size = 20000)
+    df = pd.DataFrame({'x':x})
+    opc = OutlierPercentileCapper(x = 'x', lower = 0.05, upper = 0.95)
+    opc.fit_iter(df.iloc[i:i+1000] for i in range(0,20000,1000))
+    assert abs(np.mean(x <= opc._map['x']['lower']) - 0.05) < 0.01
+    assert abs(np.mean(x <= opc._map['x']['upper']) - 0.95) < 0.01
+
+
+def test_outlier_percentile_capper_partial_fit_after_fit():
+    opc = OutlierPercentileCapper(x = 'x', lower = 0.01, upper = 0.99)
+    opc.fit(pd.DataFrame({'x': np.arange(1000.0)}))
+    opc.partial_fit(pd.DataFrame({'x': np.arange(1000.0, 1010.0)}))
+    assert opc._map['x']['lower'] == pytest.approx(10, abs = 5)
+    assert opc._map['x']['upper'] == pytest.approx(1000, abs = 5)
+
+
+def test_outlier_percentile_capper_partial_fit_after_large_fit():
+    opc = OutlierPercentileCapper(x = 'x', lower = 0.01, upper = 0.99,
+                                  sketch_size = 200)
+    opc.fit(pd.DataFrame({'x': np.arange(100000.0)}))
+    assert opc._sketches == {}
+    opc.partial_fit(pd.DataFrame({'x': np.arange(100000.0, 200000.0)}))
+    assert opc._map['x']['lower'] == pytest.approx(2000, abs = 1000)
+    assert opc._map['x']['upper'] == pytest.approx(198000, abs = 1000)
+
+
+def test_numeric_binner():
+    x = np.concatenate([np.zeros(30), np.linspace(1,70,70), [np.nan]])
+    df = pd.DataFrame({'x':x})
+    nb = NumericBinner(x = 'x', max_levels = 5)
+    nb.fit(df)
+    new = df.assign(x = [0.0, 1.0, 70.0, 1000.0, -5.0] + [np.nan]*96)
+    res = nb.transform(new)
+    assert res.x.dtype == 'category'
+    # out-of-range values are clipped into the first and last interval
+    # bins, never into the point mass at the lowest cut point
+    assert res.x.tolist()[:5] == ['01: 0', '02: (0, 1]', '07: (68.3, 70]',
+                                  '07: (68.3, 70]', '02: (0, 1]']
+    assert res.x.isna().sum() == 96
+    assert nb.transform_row({'x':35.5}) == {'x':'04: (19.1, 35.5]'}
+    assert nb.transform_row({'x':1000.0}) == {'x':'07: (68.3, 70]'}
+    assert nb.transform_row({'x':-5.0}) == {'x':'02: (0, 1]'}
+    nb = NumericBinner(x = 'x', max_levels = 5, out_of_range = 'category')
+    nb.fit(df)
+    res = nb.transform(new)
+    assert res.x.tolist()[3:5] == ['OUT OF RANGE'] * 2
+    assert res.x.isna().sum() == 96
+    assert nb.transform_row({'x':-5.0}) == {'x':'OUT OF RANGE'}
+    assert pd.isna(nb.transform_row({'x':np.nan})['x'])
+    assert pd.isna(nb.transform_row({'x':pd.NA})['x'])
+    assert type(nb.transform_row({'x':35.5})['x']) is str
+
+
+def test_numeric_binner_point_mass_only():
+    nb = NumericBinner(x = 'x')
+    nb.fit(pd.DataFrame({'x': [2.0]*50 + [np.nan]}))
+    res = nb.transform(pd.DataFrame({'x': [-5.0, 2.0, 9.0, np.nan]}))
+    # out-of-range values are clipped into the only (point mass) bin
+    assert res.x.tolist()[:3] == ['01: 2'] * 3
+    assert pd.isna(res.x[3])
+    assert nb.transform_row({'x':9.0}) == {'x':'01: 2'}
@@ -0,0 +1,217 @@
+import pytest
+import warnings
+import pandas as pd
+import numpy as np
+
+from dsutils.pipeline import Pipeline
+from dsutils.transformers import *
+
+@pytest.fixture
+def example_data():
+    return(pd.DataFrame(
+    {'x':['a','a','b','c','b','a','a'],
+     'y':np.linspace(1,7,7),
+     'd':pd.date_range('2020-01-30',periods=7)}
+    ))
+
+
+def _steps():
+    return([
+        ('bin', MaxLevelBinner(x = 'x', max_levels = 2)),
+        ('cap', OutlierPercentileCapper(x = 'y', lower = 0.1, upper = 0.9)),
+        ('date', DateComponents(x = 'd'))
+    ])
+
+
+def test_pipeline_copy_once(example_data):
+    original = example_data.copy()
+    res = Pipeline(_steps()).fit_transform(example_data)
+    res_once = Pipeline(_steps(), copy = 'once').fit_transform(example_data)
+    pd.testing.assert_frame_equal(res, res_once)
+    pd.testing.assert_frame_equal(example_data, original)
+
+
+class _Doubler:
+    # duck-typed step without an in_place argument
+    def fit(self, df):
+        return(self)
+    
+    def transform(self, df):
+        return(df.assign(y = df['y'] * 2))
+    
+    def fit_transform(self, df):
+        return(self.fit(df).transform(df))
+
+
+def test_pipeline_copy_once_duck_typed(example_data):
+    steps = lambda: _steps() + [('double', _Doubler())]
+    res = Pipeline(steps()).fit_transform(example_data)
+    res_once = Pipeline(steps(), copy = 'once').fit_transform(example_data)
+    pd.testing.assert_frame_equal(res, res_once)
+
+
+def test_pipeline_parallel_waves(example_data):
+    def steps():
+        return(_steps() + [
+            ('bin_year', MaxLevelBinner(x = 'd_YEAR', max_levels = 1))])
+    pipeline = Pipeline(steps(), n_jobs = 2)
+    waves = [[s[0] for s in w] for w in pipeline._waves(pipeline._steps)]
+    assert waves == [['bin','cap','date'],['bin_year']]
+    res = Pipeline(steps()).fit_transform(example_data)
+    for copy in ['step','once']:
+        res_parallel = Pipeline(steps(), copy = copy, n_jobs = 2) \
+            .fit_transform(example_data)
+        pd.testing.assert_frame_equal(res, res_parallel)
+
+
+def test_pipeline_parallel_copy_once_no_warnings(example_data):
+    original = example_data.copy()
+    res = Pipeline(_steps()).fit_transform(example_data)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        res_parallel = Pipeline(_steps(), copy = 'once', n_jobs = 2) \
+            .fit_transform(example_data)
+    pd.testing.assert_frame_equal(res, res_parallel)
+    pd.testing.assert_frame_equal(example_data, original)
+
+
+@pytest.mark.parametrize('copy', ['step', 'once'])
+def test_pipeline_parallel_integer_columns(copy):
+    df = pd.DataFrame({0: ['a','a','b','c','b','a','a'],
+                       1: np.linspace(1,7,7)})
+    def steps():
+        return([('bin', MaxLevelBinner(x = [0], max_levels = 2)),
+                ('cap', OutlierPercentileCapper(x = [1], lower = 0.1,
+                                                upper = 0.9))])
+    res = Pipeline(steps()).fit_transform(df)
+    res_parallel = Pipeline(steps(), copy = copy, n_jobs = 2) \
+        .fit_transform(df)
+    pd.testing.assert_frame_equal(res, res_parallel)
+
+
+def test_pipeline_refit_from(example_data, tmp_path):
+    for checkpoint in ['memory', str(tmp_path)]:
+        pipeline = Pipeline(_steps(), checkpoint = checkpoint)
+        res = pipeline.fit_transform(example_data)
+        pd.testing.assert_frame_equal(res, pipeline.transform(example_data))
+        pipeline._steps[2] = ('date', DateComponents(
+            x = 'd', components = {'year':'_Y'}))
+        res = pipeline.refit_from('date')
+        assert res.columns.tolist() == ['x','y','d','d_Y']
+        pd.testing.assert_frame_equal(res, pipeline.transform(example_data))
+
+
+def test_pipeline_checkpoint_names(example_data, tmp_path):
+    steps = [(name.replace('a', '/'), t) for name, t in _steps()]
+    pipeline = Pipeline(steps, checkpoint = str(tmp_path))
+    res = pipeline.fit_transform(example_data)
+    assert len(list(tmp_path.iterdir())) == 2
+    pd.testing.assert_frame_equal(res, pipeline.refit_from('c/p'))
+
+
+@pytest.mark.parametrize('checkpoint', ['memory', 'dir'])
+def test_pipeline_refit_from_parallel_waves(example_data, tmp_path,
+                                            checkpoint):
+    if checkpoint == 'dir': checkpoint = str(tmp_path)
+    steps = _steps() + [
+        ('bin_year', MaxLevelBinner(x = 'd_YEAR', max_levels = 1))]
+    pipeline = Pipeline(steps, n_jobs = 2, checkpoint = checkpoint)
+    res = pipeline.fit_transform(example_data)
+    bounds = dict(pipeline._steps[1][1]._map['y'])
+    # 'cap' shares the first wave with 'bin' and 'date', so its refit
+    # starts from the pipeline input rather than a wave output that
+    # already holds the capped 'y'
+    with pytest.raises(ValueError):
+        pipeline.refit_from('cap')
+    pd.testing.assert_frame_equal(
+        pipeline.refit_from('cap', example_data), res)
+    assert pipeline._steps[1][1]._map['y'] == bounds
+    pd.testing.assert_frame_equal(pipeline.refit_from('bin_year'), res)
+
+
+def test_pipeline_fit_cache(example_data, tmp_path):
+    res = Pipeline(_steps(), cache_dir = str(tmp_path)) \
+        .fit_transform(example_data)
+    assert len(list(tmp_path.iterdir())) == 3
+    pipeline = Pipeline(_steps(), cache_dir = str(tmp_path))
+    pd.testing.assert_frame_equal(res, pipeline.fit_transform(example_data))
+    assert len(list(tmp_path.iterdir())) == 3
+    changed = example_data.assign(x = ['c','c','b','c','b','a','a'])
+    pipeline = Pipeline(_steps(), cache_dir = str(tmp_path))
+    pipeline.fit(changed)
+    assert pipeline._steps[0][1]._map['x'] == {'c':'c','a':'a'}
+    assert len(list(tmp_path.iterdir())) == 4
+
+
+def test_pipeline_fit_cache_names(example_data, tmp_path):
+    steps = [('bin/x', MaxLevelBinner(x = 'x', max_levels = 2))]
+    res = Pipeline(steps, cache_dir = str(tmp_path)).fit_transform(example_data)
+    assert len(list(tmp_path.iterdir())) == 1
+    pipeline = Pipeline([('bin/x', MaxLevelBinner(x = 'x', max_levels = 2))],
+                        cache_dir = str(tmp_path))
+    pd.testing.assert_frame_equal(res, pipeline.fit_transform(example_data))
+    # parameters are hashed by value, not by their elided repr
+    cuts = np.linspace(0, 10, 2000)
+    other = cuts.copy()
+    other[1000] += 1e-3
+    fingerprints = {
+        pipeline._fingerprint(('y', NumericBinner(x = 'y', cuts = c)),
+                              example_data)
+        for c in [cuts, other]}
+    assert len(fingerprints) == 2
+
+
+def test_pipeline_transform_records(example_data):
+    pipeline = Pipeline(_steps())
+    res = pipeline.fit_transform(example_data)
+    records = pipeline.transform_records(
+        example_data.to_dict('records'))
+    expected = res.astype({'x':object}).to_dict('records')
+    assert records == expected
+    row = pipeline.transform_row(
+        {'x':'z', 'y':100.0, 'd':pd.Timestamp('2021-05-06')})
+    assert row == {'x':'_OTHER_', 'y':res.y.max(),
+                   'd':pd.Timestamp('2021-05-06'),
+                   'd_YEAR':2021, 'd_MONTH':5, 'd_DAY':6}
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_pipeline_profile(example_data, n_jobs):
+    records = []
+    pipeline = Pipeline(_steps(), n_jobs = n_jobs, profile = True,
+                        callbacks = [records.append])
+    res = pipeline.fit_transform(example_data)
+    report = pipeline.report()
+    assert len(records) == len(report)
+    assert [(r['step'], r['phase'], r['wall_time']) for r in records] == \
+        list(zip(report['step'], report['phase'], report['wall_time']))
+    assert sorted(zip(report['step'], report['phase'])) == sorted(
+        (name, phase) for name in ['bin', 'cap', 'date']
+        for phase in ['fit', 'transform'])
+    assert (report['wall_time'] >= 0).all()
+    assert (report['cpu_time'] >= 0).all()
+    concurrent = {step[0] for wave in pipeline._waves(pipeline._steps)
+                  if len(wave) > 1 and n_jobs > 1 for step in wave}
+    in_wave = report['step'].isin(concurrent)
+    assert report.loc[in_wave, 'peak_memory'].isna().all()
+    assert (report.loc[~in_wave, 'peak_memory'] >= 0).all()
+    assert (report['rows_in'] == 7).all()
+    date = report[(report['step'] == 'date') & (report['phase'] == 'transform')]
+    assert date['cols_out'].iloc[0] == date['cols_in'].iloc[0] + 3
+    assert report.loc[report['phase'] == 'fit', 'rows_out'].isna().all()
+    pipeline.transform(example_data)
+    assert list(pipeline.report()['phase']) == ['transform'] * 3
+    assert Pipeline(_steps()).report().empty
+
+
+def test_pipeline_profile_without_reset_peak(example_data, monkeypatch):
+    # tracemalloc.reset_peak is missing on Python < 3.9
+    import tracemalloc
+    monkeypatch.delattr(tracemalloc, 'reset_peak', raising = False)
+    pipeline = Pipeline(_steps(), profile = True)
+    res = pipeline.fit_transform(example_data)
+    report = pipeline.report()
+    assert len(report) == 6
+    assert report['peak_memory'].isna().all()
+    pd.testing.assert_frame_equal(
+        res, Pipeline(_steps()).fit_transform(example_data))
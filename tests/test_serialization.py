@@ -0,0 +1,60 @@
+import pytest
+import pandas as pd
+import numpy as np
+
+from dsutils.pipeline import Pipeline
+from dsutils.serialization import load
+from dsutils.transformers import *
+
+@pytest.fixture
+def example_data():
+    return(pd.DataFrame(
+    {'x':['a','a','b','c','b','a',np.nan],
+     'n':[1,2,2,3,3,3,4],
+     'y':np.linspace(1,7,7),
+     'd':pd.date_range('2020-01-30',periods=7)}
+    ))
+
+
+def test_save_load_pipeline(example_data, tmp_path):
+    pipeline = Pipeline([
+        ('bin', MaxLevelBinner(x = ['x','n'], max_levels = 2)),
+        ('cap', OutlierPercentileCapper(x = 'y', lower = 0.1, upper = 0.9)),
+        ('date', DateComponents(x = 'd'))
+    ], copy = 'once')
+    res = pipeline.fit_transform(example_data)
+    pipeline.save(str(tmp_path))
+    loaded = load(str(tmp_path))
+    assert loaded._copy == 'once'
+    assert loaded._steps[0][1]._map == pipeline._steps[0][1]._map
+    pd.testing.assert_frame_equal(res, loaded.transform(example_data))
+
+
+def test_save_load_streaming_transformer(example_data, tmp_path):
+    opc = OutlierPercentileCapper(x = 'y')
+    opc.partial_fit(example_data)
+    opc.save(str(tmp_path), training_state = True)
+    loaded = load(str(tmp_path), mmap = False)
+    loaded.partial_fit(example_data)
+    assert loaded._sketches['y'].n == 14
+
+
+def test_save_load_scoring_state(tmp_path):
+    ids = pd.DataFrame({'x': ['id' + str(i) for i in range(50000)] +
+                             ['a'] * 100 + ['b'] * 50})
+    binner = MaxLevelBinner(x = 'x', max_levels = 2)
+    res = binner.fit_transform(ids)
+    binner.save(str(tmp_path / 'scoring'))
+    binner.save(str(tmp_path / 'training'), training_state = True)
+    size = lambda d: sum(f.stat().st_size for f in d.rglob('*') if f.is_file())
+    # the level counts are only written on request
+    assert size(tmp_path / 'scoring') < 2000
+    assert size(tmp_path / 'training') > 100000
+    loaded = load(str(tmp_path / 'scoring'))
+    pd.testing.assert_frame_equal(res, loaded.transform(ids))
+    assert loaded._map == binner._map
+    with pytest.raises(Exception):
+        loaded.partial_fit(ids)
+    resumed = load(str(tmp_path / 'training'))
+    resumed.partial_fit(ids.iloc[:100])
+    assert resumed._n == len(ids) + 100
@@ -0,0 +1,237 @@
+import pytest
+import numpy as np
+import pandas as pd
+import scipy.stats as ss
+import scipy.sparse as sp
+
+from dsutils.utils.stats import cramers_corrected_stat, \
+    CramersAccumulator, reservoir_sample, cramers_associations, \
+    _drop_empty, _cramers_bound, _factorize, _pair_stat, \
+    _cramers_corrected_batch, _pairs_stat, _sampled_upper, _SCREEN_CELLS, \
+    cramers_corrected_matrix
+
+
+def _scipy_stat(a, b):
+    confusion_matrix = pd.crosstab(a, b).to_numpy()
+    chi2 = ss.chi2_contingency(confusion_matrix)[0]
+    n = confusion_matrix.sum()
+    r,k = confusion_matrix.shape
+    phi2corr = max(0, chi2/n - ((k-1)*(r-1))/(n-1))
+    rcorr = r - ((r-1)**2)/(n-1)
+    kcorr = k - ((k-1)**2)/(n-1)
+    return(np.sqrt(phi2corr / min((kcorr-1), (rcorr-1))))
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(0)
+    n = 2000
+    base = rng.integers(0, 4, n)
+    df = pd.DataFrame({
+        'a': base.astype(str),
+        'b': np.where(rng.random(n) < .7, base,
+                      rng.integers(0, 4, n)).astype(str),
+        'c': rng.integers(0, 2, n).astype(str),
+        'd': np.where(rng.random(n) < .8, base % 2, 1).astype(str),
+        'e': rng.integers(0, 30, n).astype(str)
+    })
+    df.loc[::13, 'b'] = np.nan
+    df.loc[::7, 'e'] = np.nan
+    return(df)
+
+
+@pytest.mark.parametrize('table', [
+    [[10, 3], [2, 15]],
+    [[10, 3, 4], [2, 15, 9]],
+    [[5, 5, 5]]
+])
+def test_cramers_corrected_stat(table):
+    table = np.array(table)
+    chi2 = ss.chi2_contingency(table)[0]
+    n = table.sum()
+    r,k = table.shape
+    phi2corr = max(0, chi2/n - ((k-1)*(r-1))/(n-1))
+    rcorr = r - ((r-1)**2)/(n-1)
+    kcorr = k - ((k-1)**2)/(n-1)
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        expected = np.sqrt(np.float64(phi2corr) / min(kcorr-1, rcorr-1))
+    np.testing.assert_allclose(cramers_corrected_stat(table), expected)
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_cramers_corrected_matrix(df, n_jobs):
+    Z = cramers_corrected_matrix(df, reorder_cuthill_mckee = False,
+                                 n_jobs = n_jobs)
+    for a in df.columns:
+        for b in df.columns:
+            assert Z.loc[a, b] == pytest.approx(_scipy_stat(df[a], df[b]))
+
+
+def test_cramers_corrected_matrix_reorder(df):
+    Z = cramers_corrected_matrix(df, reorder_cuthill_mckee = False)
+    R = cramers_corrected_matrix(df)
+    assert sorted(R.columns) == sorted(df.columns)
+    pd.testing.assert_frame_equal(R, Z.loc[R.index, R.columns])
+
+
+def test_cramers_accumulator(df):
+    acc = CramersAccumulator()
+    for i in range(0, len(df), 300):
+        acc.update(df.iloc[i:i+300])
+    pd.testing.assert_frame_equal(
+        acc.matrix(),
+        cramers_corrected_matrix(df))
+    se = acc.standard_errors(n_boot = 50, random_state = 0)
+    assert list(se.columns) == list(df.columns)
+    assert (se.to_numpy() >= 0).all()
+    assert se.loc['a', 'b'] > 0
+    small = acc.small_sample()
+    assert not small.loc['a', 'b']
+    assert small.loc['e', 'e']
+
+
+def test_cramers_corrected_batch():
+    rng = np.random.default_rng(0)
+    tables = rng.integers(0, 10, (20, 2, 3))
+    tables[3, 1] = 0
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        expected = [cramers_corrected_stat(_drop_empty(t)) for t in tables]
+    np.testing.assert_allclose(_cramers_corrected_batch(tables), expected)
+
+
+def test_reservoir_sample():
+    df = pd.DataFrame({'i': np.arange(100)})
+    chunks = (df.iloc[j:j+7] for j in range(0, 100, 7))
+    sample = reservoir_sample(chunks, 10, random_state = 0)
+    assert len(sample) == 10
+    assert sample['i'].is_unique
+    assert sample['i'].isin(df['i']).all()
+    assert len(reservoir_sample([df.iloc[:5]], 10)) == 5
+
+
+def test_cramers_corrected_matrix_sample(df):
+    Z = cramers_corrected_matrix(df, sample_size = 500, random_state = 0)
+    pd.testing.assert_frame_equal(
+        Z, cramers_corrected_matrix(df.sample(500, random_state = 0)))
+
+
+def _dense_pairs(df):
+    Z = cramers_corrected_matrix(df, reorder_cuthill_mckee = False)
+    Z = Z.to_numpy(copy = True)
+    np.fill_diagonal(Z, np.nan)
+    return(Z)
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_cramers_associations_threshold(df, n_jobs):
+    Z = _dense_pairs(df)
+    edges = cramers_associations(df, threshold = 0.05, n_jobs = n_jobs)
+    cols = list(df.columns)
+    expected = {(cols[a], cols[b]) for a, b in zip(*np.triu_indices(5, 1))
+                if Z[a, b] >= 0.05}
+    assert set(zip(edges['x'], edges['y'])) == expected
+    assert edges['cramers_v'].is_monotonic_decreasing
+    for x, y, v in edges.itertuples(index = False):
+        assert v == pytest.approx(Z[cols.index(x), cols.index(y)])
+
+
+def test_cramers_associations_top_k(df):
+    Z = np.nan_to_num(_dense_pairs(df), nan = -1)
+    kth = np.sort(Z, axis = 1)[:, -1]
+    S = cramers_associations(df, top_k = 1, output = 'sparse',
+                             batch_size = 2)
+    expected = (Z >= kth[:, None]) | (Z >= kth[None, :])
+    np.testing.assert_array_equal(S.toarray() > 0, expected)
+    np.testing.assert_allclose(S.toarray()[expected], Z[expected])
+
+
+def test_cramers_bound():
+    rng = np.random.default_rng(0)
+    tables = rng.integers(0, 3, (200, 3, 4))
+    tables[:, np.arange(3), np.arange(3)] += rng.integers(0, 50, (200, 3))
+    tables[:, :, 3] += 1
+    v = _cramers_corrected_batch(tables)
+    assert (v <= _cramers_bound(3, 4, tables.sum(axis = (1,2))) + 1e-12).all()
+    assert _cramers_bound(2, 40, 50) < 0.5
+
+
+def test_cramers_associations_prunes(monkeypatch):
+    rng = np.random.default_rng(1)
+    n = 20000
+    base = rng.integers(0, 4, n)
+    data = {'a': base, 'b': np.where(rng.random(n) < 0.8, base, 0)}
+    for c in 'cdefghij':
+        data[c] = rng.integers(0, 5, n)
+    df = pd.DataFrame(data).astype(str)
+    df.loc[rng.random(n) < 0.1, 'c'] = np.nan
+    expected = cramers_associations(df, threshold = 0.2, sample_size = None)
+    
+    evaluated = []
+    def counting(pairs, factorized = None):
+        evaluated.extend(pairs)
+        return(_pairs_stat(pairs, factorized))
+    monkeypatch.setattr('dsutils.utils.stats._pairs_stat', counting)
+    edges = cramers_associations(df, threshold = 0.2, sample_size = 2000,
+                                 random_state = 0)
+    assert len(evaluated) < 45 // 4
+    pd.testing.assert_frame_equal(edges, expected)
+
+
+def test_cramers_associations_high_cardinality(monkeypatch):
+    rng = np.random.default_rng(2)
+    n = 20000
+    ids = rng.integers(0, 3000, n)
+    df = pd.DataFrame({'id': ids, 'id2': (ids + rng.integers(0, 2, n)) % 3000,
+                       'c': rng.integers(0, 3, n),
+                       'd': rng.integers(0, 3, n)}).astype(str)
+    expected = cramers_associations(df, threshold = 0.2)
+    
+    cells = []
+    def counting(t, n_boot, z, rng):
+        cells.append(t.size * n_boot)
+        return(_sampled_upper(t, n_boot, z, rng))
+    monkeypatch.setattr('dsutils.utils.stats._sampled_upper', counting)
+    edges = cramers_associations(df, threshold = 0.2, sample_size = 2000,
+                                 random_state = 0)
+    assert max(cells) <= _SCREEN_CELLS
+    assert ('id', 'id2') in set(zip(edges['x'], edges['y']))
+    pd.testing.assert_frame_equal(edges, expected)
+
+
+def test_pair_stat_sparse(df, monkeypatch):
+    factorized = _factorize(df)
+    dense = [_pair_stat(factorized[i], factorized[j])
+             for i, j in zip(*np.triu_indices(5, 1))]
+    monkeypatch.setattr('dsutils.utils.stats._DENSE_CELLS', 0)
+    sparse = [_pair_stat(factorized[i], factorized[j])
+              for i, j in zip(*np.triu_indices(5, 1))]
+    np.testing.assert_allclose(sparse, dense)
+
+
+def test_cramers_accumulator_high_cardinality(monkeypatch):
+    rng = np.random.default_rng(3)
+    n = 6000
+    ids = rng.integers(0, 3000, n)
+    df = pd.DataFrame({'id': ids, 'id2': (ids + rng.integers(0, 2, n)) % 3000,
+                       'c': rng.integers(0, 3, n)}).astype(str)
+    monkeypatch.setattr('dsutils.utils.stats._DENSE_CELLS', 10**5)
+    acc = CramersAccumulator()
+    for i in range(0, n, 1000):
+        acc.update(df.iloc[i:i+1000])
+    assert (0, 0) not in acc._tables
+    assert sp.issparse(acc._tables[(0, 1)])
+    assert isinstance(acc._tables[(0, 2)], np.ndarray)
+    pd.testing.assert_frame_equal(
+        acc.matrix(reorder_cuthill_mckee = False),
+        cramers_corrected_matrix(df, reorder_cuthill_mckee = False))
+    se = acc.standard_errors(n_boot = 20, random_state = 0)
+    assert np.isfinite(se.loc['id', 'id2']) and se.loc['id', 'id2'] > 0
+    assert acc.small_sample().loc['id', 'id2']
+
+
+def test_cramers_accumulator_sparse(df, monkeypatch):
+    acc = CramersAccumulator().update(df)
+    monkeypatch.setattr('dsutils.utils.stats._DENSE_CELLS', 0)
+    sparse = CramersAccumulator().update(df)
+    pd.testing.assert_frame_equal(sparse.matrix(), acc.matrix())
+    pd.testing.assert_frame_equal(sparse.small_sample(), acc.small_sample())